@@ -0,0 +1,82 @@
+#Cầu (tuyến đường trọng yếu), điểm khớp (nút giao trọng yếu) và thành phần song liên thông
+
+from typing import List, Tuple
+from algorithms.connectivity import index_adjacency
+
+def find_bridges(adj_list) -> Tuple[List[tuple], List, List[List[tuple]]]:
+    """
+    Thuật toán low-link (Tarjan/Hopcroft) 1 lượt O(V + E), dùng stack tường minh
+    nên không tràn đệ quy trên bản đồ lớn.
+    Input: danh sách kề VÔ HƯỚNG (dict {u: [v, ...]} / {u: [(v, w), ...]} hoặc CSRGraph).
+    Cạnh song song (2 tuyến cùng nối u-v) được tính riêng, nên không phải là cầu.
+    Output: (bridges, articulation_points, components)
+    - bridges: [(u, v)] - đóng 1 tuyến này là chia cắt bản đồ.
+    - articulation_points: [u] - đóng nút giao này là chia cắt bản đồ.
+    - components: [[(u, v), ...]] - các thành phần song liên thông (theo cạnh);
+      mỗi cầu là 1 thành phần chỉ gồm chính nó.
+    """
+    nodes, neighbors = index_adjacency(adj_list)
+    n = len(nodes)
+    disc = [-1] * n         # Thời điểm thăm
+    low = [0] * n
+    is_cut = [False] * n
+    bridges, components = [], []
+    edge_stack = []
+    timer = 0
+
+    for root in range(n):
+        if disc[root] >= 0:
+            continue
+        disc[root] = low[root] = timer
+        timer += 1
+        root_children = 0
+        # Khung: [đỉnh, cha, iterator đỉnh kề, đã bỏ qua cạnh về cha chưa]
+        stack = [[root, -1, iter(neighbors[root]), False]]
+
+        while stack:
+            frame = stack[-1]
+            u, p, it = frame[0], frame[1], frame[2]
+            for v in it:
+                if v == u:
+                    continue # Khuyên (tự nối) không ảnh hưởng liên thông
+                if v == p and not frame[3]:
+                    frame[3] = True # Chỉ bỏ 1 cạnh về cha, cạnh song song thứ 2 là cạnh ngược
+                    continue
+                if disc[v] < 0:
+                    disc[v] = low[v] = timer
+                    timer += 1
+                    edge_stack.append((u, v))
+                    stack.append([v, u, iter(neighbors[v]), False])
+                    break
+                if disc[v] < disc[u]:
+                    # Cạnh ngược lên tổ tiên
+                    edge_stack.append((u, v))
+                    if disc[v] < low[u]:
+                        low[u] = disc[v]
+            else:
+                stack.pop()
+                if p < 0:
+                    continue
+                if low[u] < low[p]:
+                    low[p] = low[u]
+                if low[u] >= disc[p]:
+                    # p tách cây con của u: gom các cạnh của thành phần song liên thông
+                    if p == root:
+                        root_children += 1
+                    else:
+                        is_cut[p] = True
+                    comp = []
+                    while True:
+                        e = edge_stack.pop()
+                        comp.append((nodes[e[0]], nodes[e[1]]))
+                        if e == (p, u):
+                            break
+                    components.append(comp)
+                    if low[u] > disc[p]:
+                        bridges.append((nodes[p], nodes[u]))
+
+        if root_children > 1:
+            is_cut[root] = True
+
+    articulation_points = [nodes[u] for u in range(n) if is_cut[u]]
+    return bridges, articulation_points, components
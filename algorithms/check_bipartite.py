@@ -1,17 +1,22 @@
 #Kiểm tra đồ thị 2 phía (bipartite)
 
 from collections import deque
+from core.graph import CSRGraph
 
 def check_bipartite(adj_list):
     """
     Kiểm tra đồ thị có phải là đồ thị 2 phía (bipartite) hay không.
-    Input: adj_list (dict): Danh sách kề {u: [v1, v2, ...]}
+    Input: adj_list (dict): Danh sách kề {u: [v1, v2, ...]} hoặc CSRGraph
     Output: (is_bipartite, color_map)
             - is_bipartite: True/False
             - color_map: Dict {node: 0/1} nếu là bipartite, ngược lại None
     """
+    if isinstance(adj_list, CSRGraph):
+        return _check_bipartite_csr(adj_list)
+
+    # Danh sách kề có trọng số {u: [(v, w), ...]}: xác định 1 lần thay vì kiểm tra từng đỉnh kề
+    weighted = any(isinstance(nbrs[0], tuple) for nbrs in adj_list.values() if nbrs)
     color_map = {}
-    is_bipartite = True
 
     # Duyệt qua tất cả các đỉnh để xử lý đồ thị không liên thông
     for node in adj_list:
@@ -22,20 +27,141 @@ def check_bipartite(adj_list):
 
             while queue:
                 u = queue.popleft()
+                cu = color_map[u]
                 
                 # Duyệt các đỉnh kề
                 neighbors = adj_list.get(u, [])
+                if weighted:
+                    neighbors = [v for v, _ in neighbors]
                 for v in neighbors:
-                    # Nếu v là tuple (v, w) (trường hợp có trọng số) -> lấy v[0]
-                    if isinstance(v, tuple):
-                        v = v[0]
-                    
                     if v not in color_map:
                         # Tô màu đối lập với u
-                        color_map[v] = 1 - color_map[u]
+                        color_map[v] = 1 - cu
                         queue.append(v)
-                    elif color_map[v] == color_map[u]:
+                    elif color_map[v] == cu:
                         # Nếu v đã có màu và cùng màu với u -> Không phải 2 phía
                         return False, {}
     
-    return True, color_map
\ No newline at end of file
+    return True, color_map
+
+def _check_bipartite_csr(csr):
+    # Màu -1 = chưa tô; duyệt thẳng trên mảng targets, không cần kiểm tra tuple
+    offsets, targets = csr.offsets, csr.targets
+    color = [-1] * csr.num_nodes
+
+    for node in range(csr.num_nodes):
+        if color[node] != -1:
+            continue
+        color[node] = 0
+        queue = deque([node])
+        while queue:
+            u = queue.popleft()
+            cu = color[u]
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                if color[v] == -1:
+                    color[v] = 1 - cu
+                    queue.append(v)
+                elif color[v] == cu:
+                    return False, {}
+
+    return True, dict(enumerate(color))
+
+class BipartiteTracker:
+    """
+    Theo dõi tính 2 phía khi bản đồ được vẽ thêm dần (chỉ thêm đỉnh / cạnh, bỏ qua chiều):
+    - Union-Find có chẵn lẻ: mỗi đỉnh lưu độ lệch màu (0/1) so với cha; thêm cạnh u-v
+      là gộp 2 tập với ràng buộc màu u != màu v, gần O(1) mỗi cạnh.
+    - Cạnh đầu tiên nối 2 đỉnh cùng tập, cùng màu làm đồ thị hết 2 phía. Khi đó tìm
+      bằng chứng: BFS đường ngắn nhất u -> v trên đồ thị TRƯỚC khi thêm cạnh (còn 2 phía
+      nên đường này có độ dài chẵn, đơn) + cạnh v-u = chu trình lẻ ngắn nhất qua cạnh đó.
+    Đồ thị đã không 2 phía thì thêm cạnh không làm nó 2 phía lại, bằng chứng được giữ.
+    """
+    def __init__(self, num_nodes=0, edges=()):
+        self.parent = []
+        self.rank = []
+        self.parity = []            # Màu của đỉnh XOR màu của cha
+        self.adj = []               # Danh sách kề vô hướng (chỉ dùng khi tìm bằng chứng)
+        self.is_bipartite = True
+        self.witness = None         # Chu trình lẻ [a, b, ..., a] khi hết 2 phía
+        for _ in range(num_nodes):
+            self.add_node()
+        for u, v in edges:
+            self.add_edge(u, v)
+
+    def add_node(self):
+        key = len(self.parent)
+        self.parent.append(key)
+        self.rank.append(0)
+        self.parity.append(0)
+        self.adj.append([])
+        return key
+
+    def find(self, u):
+        """(gốc, màu của u so với gốc), nén đường không đệ quy."""
+        parent, parity = self.parent, self.parity
+        path = []
+        while parent[u] != u:
+            path.append(u)
+            u = parent[u]
+        root, p = u, 0
+        # Đi ngược từ đỉnh gần gốc nhất: cộng dồn độ lệch rồi trỏ thẳng về gốc
+        for x in reversed(path):
+            p ^= parity[x]
+            parity[x] = p
+            parent[x] = root
+        return root, (parity[path[0]] if path else 0)
+
+    def add_edge(self, u, v):
+        """Thêm cạnh u-v. Trả về True nếu đồ thị vẫn là 2 phía."""
+        if self.is_bipartite:
+            root_u, pu = self.find(u)
+            root_v, pv = self.find(v)
+            if root_u != root_v:
+                if self.rank[root_u] < self.rank[root_v]:
+                    root_u, root_v = root_v, root_u
+                self.parent[root_v] = root_u
+                self.parity[root_v] = pu ^ pv ^ 1
+                if self.rank[root_u] == self.rank[root_v]:
+                    self.rank[root_u] += 1
+            elif pu == pv:
+                self.is_bipartite = False
+                self.witness = self._odd_cycle(u, v)
+
+        self.adj[u].append(v)
+        if u != v:
+            self.adj[v].append(u)
+        return self.is_bipartite
+
+    def _odd_cycle(self, u, v):
+        # BFS u -> v trên đồ thị chưa có cạnh u-v mới
+        if u == v:
+            return [u, u]
+        came = {u: None}
+        queue = deque([u])
+        while queue:
+            x = queue.popleft()
+            if x == v:
+                break
+            for y in self.adj[x]:
+                if y not in came:
+                    came[y] = x
+                    queue.append(y)
+        cycle = [v]
+        while cycle[-1] != u:
+            cycle.append(came[cycle[-1]])
+        cycle.reverse()
+        cycle.append(u)
+        return cycle
+
+    def witness_edges(self):
+        """Các cạnh của chu trình lẻ [(a, b), ...] (rỗng nếu vẫn là 2 phía)."""
+        if not self.witness:
+            return []
+        return list(zip(self.witness, self.witness[1:]))
+
+    def coloring(self):
+        """{đỉnh: 0/1} nếu là 2 phía (mỗi thành phần tô riêng), ngược lại None."""
+        if not self.is_bipartite:
+            return None
+        return {u: self.find(u)[1] for u in range(len(self.parent))}
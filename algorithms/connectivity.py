@@ -0,0 +1,162 @@
+#Tính liên thông: thành phần liên thông yếu (Union-Find) và liên thông mạnh (Tarjan) + DAG thu gọn
+
+from typing import Dict, List
+from core.graph import CSRGraph
+from algorithms.mst import KruskalSolver
+
+def index_adjacency(adj_list):
+    # Chuẩn hóa về (danh sách đỉnh, danh sách kề theo chỉ số 0..n-1)
+    if isinstance(adj_list, CSRGraph):
+        n = adj_list.num_nodes
+        return list(range(n)), [adj_list.neighbors(u) for u in range(n)]
+
+    nodes = list(adj_list.keys())
+    index = {u: i for i, u in enumerate(nodes)}
+    neighbors = []
+    for u in nodes:
+        row = []
+        for v in adj_list[u]:
+            v = v[0] if isinstance(v, tuple) else v
+            if v in index:
+                row.append(index[v])
+        neighbors.append(row)
+    return nodes, neighbors
+
+def weak_components(neighbors) -> List[int]:
+    """Nhãn thành phần liên thông yếu (bỏ qua chiều cung) cho từng đỉnh, đánh số 0, 1, ..."""
+    n = len(neighbors)
+    dsu = KruskalSolver(n)
+    for u in range(n):
+        for v in neighbors[u]:
+            dsu.union(u, v)
+
+    labels, roots = [0] * n, {}
+    for u in range(n):
+        labels[u] = roots.setdefault(dsu.find(u), len(roots))
+    return labels
+
+def strong_components(neighbors) -> List[int]:
+    """
+    Tarjan không đệ quy: nhãn thành phần liên thông mạnh cho từng đỉnh.
+    Thành phần được đánh số theo thứ tự hoàn tất, tức thứ tự tô-pô NGƯỢC của
+    DAG thu gọn (thành phần 0 không có cung đi ra thành phần khác).
+    """
+    n = len(neighbors)
+    order = [-1] * n        # Thứ tự thăm
+    low = [0] * n
+    labels = [-1] * n
+    on_stack = [False] * n
+    scc_stack = []
+    counter = 0
+    count = 0
+
+    for root in range(n):
+        if order[root] >= 0:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        scc_stack.append(root)
+        on_stack[root] = True
+        call = [(root, iter(neighbors[root]))]   # Stack mô phỏng lời gọi đệ quy
+
+        while call:
+            u, it = call[-1]
+            for v in it:
+                if order[v] < 0:
+                    order[v] = low[v] = counter
+                    counter += 1
+                    scc_stack.append(v)
+                    on_stack[v] = True
+                    call.append((v, iter(neighbors[v])))
+                    break
+                if on_stack[v] and order[v] < low[u]:
+                    low[u] = order[v]
+            else:
+                call.pop()
+                if call:
+                    p = call[-1][0]
+                    if low[u] < low[p]:
+                        low[p] = low[u]
+                if low[u] == order[u]:
+                    # u là gốc của 1 thành phần: lấy hết đỉnh phía trên u khỏi stack
+                    while True:
+                        w = scc_stack.pop()
+                        on_stack[w] = False
+                        labels[w] = count
+                        if w == u:
+                            break
+                    count += 1
+    return labels
+
+def condensation(neighbors, labels) -> List[List[int]]:
+    """DAG thu gọn: mỗi thành phần mạnh là 1 đỉnh, cung giữa các thành phần khác nhau (không lặp)."""
+    count = max(labels) + 1 if labels else 0
+    dag = [set() for _ in range(count)]
+    for u in range(len(neighbors)):
+        cu = labels[u]
+        for v in neighbors[u]:
+            cv = labels[v]
+            if cu != cv:
+                dag[cu].add(cv)
+    return [sorted(out) for out in dag]
+
+class Connectivity:
+    """
+    Kết quả phân tích liên thông của 1 bản đồ (dict {u: [v, ...]} hoặc CSRGraph).
+    Tính 1 lần trong O(V + E), sau đó các câu hỏi điều kiện là O(1); nên giữ theo
+    version của mô hình, vd. model.cached(("connectivity", directed), ...).
+    - weak / strong: {đỉnh: nhãn thành phần}.
+    - dag: DAG thu gọn theo nhãn thành phần mạnh.
+    """
+    def __init__(self, adj_list):
+        nodes, neighbors = index_adjacency(adj_list)
+        weak = weak_components(neighbors)
+        strong = strong_components(neighbors)
+
+        self.nodes = nodes
+        self.weak: Dict = dict(zip(nodes, weak))
+        self.strong: Dict = dict(zip(nodes, strong))
+        self.num_weak = max(weak) + 1 if weak else 0
+        self.num_strong = max(strong) + 1 if strong else 0
+        self.dag = condensation(neighbors, strong)
+
+        # Các thành phần yếu có chứa cạnh (đỉnh cô lập không ảnh hưởng Euler)
+        self._edge_components = {weak[u] for u in range(len(nodes)) if len(neighbors[u])}
+        self._reach = {}
+
+    def is_connected(self) -> bool:
+        """Liên thông (yếu): bỏ qua chiều, mọi đỉnh nối với nhau."""
+        return self.num_weak <= 1
+
+    def is_strongly_connected(self) -> bool:
+        """Liên thông mạnh: từ mỗi đỉnh đi được tới mọi đỉnh khác theo đúng chiều."""
+        return self.num_strong <= 1
+
+    def edges_connected(self) -> bool:
+        """Mọi cạnh nằm trong cùng 1 thành phần (điều kiện liên thông của Euler)."""
+        return len(self._edge_components) <= 1
+
+    def same_component(self, u, v) -> bool:
+        return self.weak[u] == self.weak[v]
+
+    def reachable(self, u, v) -> bool:
+        """
+        Có đường đi u -> v không: cùng thành phần mạnh -> có; khác thành phần yếu
+        -> không; còn lại tìm trên DAG thu gọn (nhớ kết quả theo thành phần của u).
+        """
+        cu, cv = self.strong[u], self.strong[v]
+        if cu == cv:
+            return True
+        if self.weak[u] != self.weak[v] or cv > cu:
+            # Nhãn Tarjan theo thứ tự tô-pô ngược: cung DAG chỉ đi tới nhãn nhỏ hơn
+            return False
+        seen = self._reach.get(cu)
+        if seen is None:
+            seen, stack = {cu}, [cu]
+            while stack:
+                for c in self.dag[stack.pop()]:
+                    if c not in seen:
+                        seen.add(c)
+                        stack.append(c)
+            self._reach[cu] = seen
+        return cv in seen
@@ -0,0 +1,356 @@
+#Tiền xử lý Contraction Hierarchies (CH) cho truy vấn đường đi lặp lại nhiều lần
+
+import heapq
+import hashlib
+import json
+import os
+from array import array
+from typing import Dict, List, Tuple, Optional
+from algorithms.shortest_path import TrafficGraph
+
+FORMAT_VERSION = 1
+
+class ContractionHierarchy:
+    """
+    Contraction Hierarchies trên TrafficGraph cho 1 mode ('time' / 'distance'):
+    - Tiền xử lý: lần lượt "co" từng đỉnh theo thứ tự ưu tiên (edge difference,
+      cập nhật lười). Khi co v, với mỗi cặp u -> v -> w chưa có đường chứng kiến
+      (witness) ngắn hơn thì thêm cạnh tắt u -> w, ghi nhớ đỉnh giữa v.
+    - Đồ thị lên (up): cạnh từ đỉnh hạng thấp lên hạng cao, dùng cho lượt tìm xuôi.
+      Đồ thị xuống (down): cạnh từ hạng cao xuống hạng thấp, lưu ngược tại đỉnh
+      hạng thấp, dùng cho lượt tìm ngược từ đích.
+    - Truy vấn: Dijkstra 2 chiều chỉ đi lên (kèm stall-on-demand), sau đó
+      bung cạnh tắt về dãy đỉnh gốc. Kết quả (path, cost) giống a_star_search.
+    - Có thể lưu ra file JSON cạnh file bản đồ, kèm dấu vân tay (fingerprint)
+      của đồ thị để bỏ qua file cũ khi bản đồ đã thay đổi.
+    """
+    def __init__(self, graph: TrafficGraph, mode: str, rank, edges, fingerprint: str):
+        self.graph = graph
+        self.mode = mode
+        self.fingerprint = fingerprint
+        self.version = graph.version                    # Phiên bản đồ thị lúc dựng / nạp
+        self.rank = array('i', rank)                    # Thứ tự co của từng đỉnh
+        self.middle: Dict[Tuple[int, int], int] = {}    # Cạnh tắt (u, w) -> đỉnh giữa
+
+        n = len(self.rank)
+        up = [[] for _ in range(n)]
+        down = [[] for _ in range(n)]
+        for u, w, cost, mid in edges:
+            if mid >= 0:
+                self.middle[(u, w)] = mid
+            if self.rank[u] < self.rank[w]:
+                up[u].append((w, cost))
+            else:
+                down[w].append((u, cost))
+
+        self.up = self._pack(up)
+        self.down = self._pack(down)
+
+    @staticmethod
+    def _pack(lists):
+        # Danh sách kề -> CSR (offsets, targets, weights)
+        offsets = array('q', [0])
+        targets = array('i')
+        weights = array('d')
+        for row in lists:
+            for v, w in row:
+                targets.append(v)
+                weights.append(w)
+            offsets.append(len(targets))
+        return offsets, targets, weights
+
+    def _edges(self):
+        # Toàn bộ cạnh (gốc + tắt) dạng (u, w, cost, mid) để lưu file
+        offsets, targets, weights = self.up
+        for u in range(len(self.rank)):
+            for i in range(offsets[u], offsets[u + 1]):
+                w = targets[i]
+                yield u, w, weights[i], self.middle.get((u, w), -1)
+        offsets, targets, weights = self.down
+        for w in range(len(self.rank)):
+            for i in range(offsets[w], offsets[w + 1]):
+                u = targets[i]
+                yield u, w, weights[i], self.middle.get((u, w), -1)
+
+    def num_shortcuts(self) -> int:
+        return len(self.middle)
+
+    # ---------- Tiền xử lý ----------
+
+    @classmethod
+    def build(cls, graph: TrafficGraph, mode: str = 'time', witness_limit: int = 50):
+        """
+        Dựng CH từ đồ thị. witness_limit: số đỉnh tối đa mỗi lượt tìm chứng kiến
+        được duyệt (hết giới hạn thì thêm cạnh tắt cho chắc - vẫn đúng, chỉ dư cạnh).
+        """
+        n = graph.num_nodes()
+        weights = graph.weights(mode)
+        # Đồ thị còn lại (chỉ gồm đỉnh chưa co), kể cả cạnh tắt đã thêm
+        out: List[Dict[int, float]] = [{} for _ in range(n)]
+        inn: List[Dict[int, float]] = [{} for _ in range(n)]
+        middle: Dict[Tuple[int, int], int] = {}
+        edges = []  # Cạnh của CH, ghi lại khi đầu mút đầu tiên bị co
+
+        # Cạnh gốc: bỏ khuyên, cạnh song song giữ trọng số nhỏ nhất
+        for a in range(graph.num_arcs()):
+            u, v, w = graph.arc_from[a], graph.arc_to[a], weights[a]
+            if u != v and w < out[u].get(v, float('inf')):
+                out[u][v] = w
+                inn[v][u] = w
+
+        deleted_neighbors = array('i', bytes(4 * n))
+
+        def witness(src, skip, limit, targets):
+            # Dijkstra giới hạn từ src trên đồ thị còn lại, không đi qua skip
+            dist = {src: 0.0}
+            heap = [(0.0, src)]
+            remaining = len(targets)
+            settled = 0
+            while heap:
+                d, x = heapq.heappop(heap)
+                if d > dist[x]:
+                    continue
+                if d > limit:
+                    break
+                if x in targets:
+                    remaining -= 1
+                    if remaining == 0:
+                        break
+                settled += 1
+                if settled > witness_limit:
+                    break
+                for y, w in out[x].items():
+                    if y == skip:
+                        continue
+                    nd = d + w
+                    if nd < dist.get(y, float('inf')):
+                        dist[y] = nd
+                        heapq.heappush(heap, (nd, y))
+            return dist
+
+        def shortcuts_for(v):
+            # Các cạnh tắt cần thêm khi co v: [(u, w, cost)]
+            ins = list(inn[v].items())
+            outs = list(out[v].items())
+            result = []
+            for u, c_uv in ins:
+                targets = {w: c_uv + c_vw for w, c_vw in outs if w != u}
+                if not targets:
+                    continue
+                dist = witness(u, v, max(targets.values()), targets)
+                for w, cost in targets.items():
+                    if dist.get(w, float('inf')) > cost:
+                        result.append((u, w, cost))
+            return result, len(ins) + len(outs)
+
+        def priority(v):
+            added, removed = shortcuts_for(v)
+            return len(added) - removed + deleted_neighbors[v], added
+
+        heap = [(priority(v)[0], v) for v in range(n)]
+        heapq.heapify(heap)
+        rank = array('i', bytes(4 * n))
+        order = 0
+
+        while heap:
+            _, v = heapq.heappop(heap)
+            # Cập nhật lười: tính lại ưu tiên, nếu không còn nhỏ nhất thì đẩy lại
+            p, added = priority(v)
+            if heap and p > heap[0][0]:
+                heapq.heappush(heap, (p, v))
+                continue
+
+            for u, w, cost in added:
+                if cost < out[u].get(w, float('inf')):
+                    out[u][w] = cost
+                    inn[w][u] = cost
+                    middle[(u, w)] = v
+
+            # Gỡ v khỏi đồ thị còn lại, cạnh của v chuyển vào CH
+            for w, cost in out[v].items():
+                edges.append((v, w, cost, middle.get((v, w), -1)))
+                del inn[w][v]
+            for u, cost in inn[v].items():
+                edges.append((u, v, cost, middle.get((u, v), -1)))
+                del out[u][v]
+            for x in out[v].keys() | inn[v].keys():
+                deleted_neighbors[x] += 1
+            out[v] = inn[v] = None
+            rank[v] = order
+            order += 1
+
+        return cls(graph, mode, rank, edges, fingerprint(graph, mode))
+
+    # ---------- Truy vấn ----------
+
+    def upward_search(self, v: int, backward: bool = False) -> Dict[int, float]:
+        """
+        Toàn bộ không gian tìm kiếm đi lên từ đỉnh v (chỉ số):
+        backward=False theo đồ thị up (v -> x), True theo đồ thị down (x -> v).
+        Dùng cho truy vấn nhiều-nhiều (ma trận) theo kiểu bucket.
+        """
+        INF = float('inf')
+        offsets, targets, weights = self.down if backward else self.up
+        s_offsets, s_targets, s_weights = self.up if backward else self.down
+        dist = {v: 0.0}
+        settled = {}
+        heap = [(0.0, v)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            # Stall-on-demand như trong query
+            stalled = False
+            for i in range(s_offsets[u], s_offsets[u + 1]):
+                if dist.get(s_targets[i], INF) + s_weights[i] < d:
+                    stalled = True
+                    break
+            if stalled:
+                continue
+            settled[u] = d
+            for i in range(offsets[u], offsets[u + 1]):
+                x = targets[i]
+                nd = d + weights[i]
+                if nd < dist.get(x, INF):
+                    dist[x] = nd
+                    heapq.heappush(heap, (nd, x))
+        return settled
+
+    def query(self, start: str, end: str) -> Tuple[Optional[List[str]], float]:
+        """Đường đi ngắn nhất start -> end, output giống a_star_search: (path, cost)."""
+        index = self.graph.index
+        if start not in index or end not in index:
+            return None, float('inf')
+
+        s, t = index[start], index[end]
+        if s == t:
+            return [start], 0.0
+
+        INF = float('inf')
+        graphs = (self.up, self.down)
+        dist = ({s: 0.0}, {t: 0.0})
+        parent = ({}, {})
+        heaps = ([(0.0, s)], [(0.0, t)])
+        best, meet = INF, None
+        side = 0
+
+        while heaps[0] or heaps[1]:
+            if not heaps[side]:
+                side ^= 1
+            d, u = heapq.heappop(heaps[side])
+            my_dist, other_dist = dist[side], dist[side ^ 1]
+            if d > my_dist[u]:
+                continue
+            if d >= best:
+                heaps[side].clear() # Phía này không thể cải thiện thêm
+                continue
+
+            if u in other_dist and d + other_dist[u] < best:
+                best, meet = d + other_dist[u], u
+
+            # Stall-on-demand: có đường ngắn hơn tới u đi xuống từ đỉnh hạng cao
+            # thì u không nằm trên đường đi lên tối ưu, khỏi mở rộng
+            offsets, targets, weights = graphs[side ^ 1]
+            stalled = False
+            for i in range(offsets[u], offsets[u + 1]):
+                if my_dist.get(targets[i], INF) + weights[i] < d:
+                    stalled = True
+                    break
+
+            if not stalled:
+                offsets, targets, weights = graphs[side]
+                for i in range(offsets[u], offsets[u + 1]):
+                    v = targets[i]
+                    nd = d + weights[i]
+                    if nd < my_dist.get(v, INF):
+                        my_dist[v] = nd
+                        parent[side][v] = u
+                        heapq.heappush(heaps[side], (nd, v))
+
+            side ^= 1
+
+        if meet is None:
+            return None, INF
+
+        # Dãy đỉnh trên CH: s -> ... -> meet -> ... -> t
+        chain = [meet]
+        v = meet
+        while v != s:
+            v = parent[0][v]
+            chain.append(v)
+        chain.reverse()
+        v = meet
+        while v != t:
+            v = parent[1][v]
+            chain.append(v)
+
+        path = [s]
+        for a, b in zip(chain, chain[1:]):
+            self._unpack(a, b, path)
+        return [self.graph.ids[i] for i in path], best
+
+    def _unpack(self, u: int, w: int, path: List[int]) -> None:
+        # Bung cạnh tắt u -> w thành các cạnh gốc (dùng ngăn xếp, không đệ quy)
+        stack = [(u, w)]
+        while stack:
+            a, b = stack.pop()
+            mid = self.middle.get((a, b))
+            if mid is None:
+                path.append(b)
+            else:
+                stack.append((mid, b))
+                stack.append((a, mid))
+
+    # ---------- Lưu / nạp ----------
+
+    def save(self, path: str) -> None:
+        data = {
+            "format": FORMAT_VERSION,
+            "mode": self.mode,
+            "fingerprint": self.fingerprint,
+            "rank": list(self.rank),
+            "edges": [list(e) for e in self._edges()],
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path: str, graph: TrafficGraph, mode: str = 'time'):
+        """Nạp CH đã lưu; trả về None nếu file không khớp đồ thị / mode hiện tại."""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if (data.get("format") != FORMAT_VERSION or data.get("mode") != mode
+                or data.get("fingerprint") != fingerprint(graph, mode)):
+            return None
+        return cls(graph, mode, data["rank"], data["edges"], data["fingerprint"])
+
+def fingerprint(graph: TrafficGraph, mode: str = 'time') -> str:
+    """Dấu vân tay của đồ thị (đỉnh, cung, trọng số theo mode)."""
+    h = hashlib.sha1()
+    h.update(mode.encode())
+    h.update("\x00".join(graph.ids).encode())
+    h.update(graph.arc_from.tobytes())
+    h.update(graph.arc_to.tobytes())
+    h.update(graph.weights(mode).tobytes())
+    return h.hexdigest()
+
+def hierarchy_path(map_path: str, mode: str = 'time') -> str:
+    """File CH đi kèm bản đồ: 'map.json' -> 'map.ch_time.json'."""
+    root, _ = os.path.splitext(map_path)
+    return f"{root}.ch_{mode}.json"
+
+def load_or_build(graph: TrafficGraph, map_path: str, mode: str = 'time') -> ContractionHierarchy:
+    """Dùng lại CH đã lưu cạnh bản đồ nếu còn khớp, nếu không thì dựng lại và lưu."""
+    path = hierarchy_path(map_path, mode)
+    ch = ContractionHierarchy.load(path, graph, mode)
+    if ch is None:
+        ch = ContractionHierarchy.build(graph, mode)
+        try:
+            ch.save(path)
+        except OSError:
+            pass # Không ghi được file thì vẫn dùng CH trong bộ nhớ
+    return ch
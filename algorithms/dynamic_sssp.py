@@ -0,0 +1,141 @@
+#Cây đường đi ngắn nhất động: sửa cục bộ khi trọng số thay đổi (kiểu Ramalingam-Reps)
+
+import heapq
+from typing import List, Tuple, Optional
+from algorithms.shortest_path import TrafficGraph, shortest_path_tree
+
+class DynamicShortestPathTree:
+    """
+    Cây đường đi ngắn nhất từ 1 nguồn, giữ đồng bộ với đồ thị khi tắc đường đổi:
+    - refresh() lấy các cung đã đổi từ graph.changed_arcs_since(version).
+    - Cung trên cây bị tăng: cả cây con phía dưới mất khoảng cách; mỗi đỉnh trong đó
+      lấy lại giá trị tạm từ các đỉnh cha không bị ảnh hưởng.
+    - Cung ngoài cây bị giảm: đỉnh cuối cung có thể được cải thiện.
+    - Sau đó chạy Dijkstra chỉ từ các đỉnh bị ảnh hưởng, phần còn lại của cây giữ nguyên.
+    - Đồ thị đổi cấu trúc (thêm đỉnh / đường) thì tính lại từ đầu.
+    """
+    def __init__(self, graph: TrafficGraph, source: str, mode: str = 'time'):
+        self.graph = graph
+        self.source = source
+        self.mode = mode
+        self.last_affected = 0      # Số đỉnh phải tính lại ở lần refresh gần nhất
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self.dist, self.parent = shortest_path_tree(self.graph, self.graph.index[self.source], self.mode)
+        self.version = self.graph.version
+        self.last_affected = self.graph.num_nodes()
+
+    def refresh(self) -> None:
+        """Đưa cây về đúng với đồ thị hiện tại (sửa cục bộ nếu được)."""
+        graph = self.graph
+        if self.version == graph.version:
+            return
+        changed = graph.changed_arcs_since(self.version)
+        if changed is None:
+            self._rebuild()
+            return
+        self._repair(changed)
+        self.version = graph.version
+
+    def _repair(self, changed) -> None:
+        graph = self.graph
+        dist, parent = self.dist, self.parent
+        weights = graph.weights(self.mode)
+        arc_from, arc_to = graph.arc_from, graph.arc_to
+        out_offsets, out_arcs = graph.out_index()
+        in_offsets, in_arcs = graph.in_index()
+        INF = float('inf')
+
+        # 1. Cung trên cây bị tăng -> gốc của các cây con bị ảnh hưởng
+        roots = []
+        decreased = []
+        for a in changed:
+            u, v = arc_from[a], arc_to[a]
+            if dist[u] == INF:
+                continue
+            d = dist[u] + weights[a]
+            if parent[v] == a:
+                if d > dist[v]:
+                    roots.append(v)
+                elif d < dist[v]:
+                    decreased.append(a)
+            elif d < dist[v]:
+                decreased.append(a)
+
+        # 2. Đánh dấu toàn bộ cây con (con của x: cung ra a với parent[đích] == a)
+        affected = set(roots)
+        stack = list(roots)
+        while stack:
+            x = stack.pop()
+            for i in range(out_offsets[x], out_offsets[x + 1]):
+                a = out_arcs[i]
+                y = arc_to[a]
+                if parent[y] == a and y not in affected:
+                    affected.add(y)
+                    stack.append(y)
+
+        for v in affected:
+            dist[v] = INF
+            parent[v] = -1
+
+        # 3. Giá trị tạm cho đỉnh bị ảnh hưởng: tốt nhất từ đỉnh cha không bị ảnh hưởng
+        heap = []
+        for v in affected:
+            best, best_arc = INF, -1
+            for i in range(in_offsets[v], in_offsets[v + 1]):
+                a = in_arcs[i]
+                u = arc_from[a]
+                if u not in affected and dist[u] + weights[a] < best:
+                    best, best_arc = dist[u] + weights[a], a
+            if best_arc >= 0:
+                dist[v] = best
+                parent[v] = best_arc
+                heap.append((best, v))
+
+        # 4. Cung bị giảm (kể cả cung trên cây giảm)
+        for a in decreased:
+            u, v = arc_from[a], arc_to[a]
+            d = dist[u] + weights[a]
+            if d < dist[v]:
+                dist[v] = d
+                parent[v] = a
+                heap.append((d, v))
+
+        # 5. Dijkstra lan truyền từ các đỉnh đã thay đổi
+        heapq.heapify(heap)
+        touched = set(affected)
+        while heap:
+            d_u, u = heapq.heappop(heap)
+            if d_u > dist[u]:
+                continue
+            touched.add(u)
+            for i in range(out_offsets[u], out_offsets[u + 1]):
+                a = out_arcs[i]
+                v = arc_to[a]
+                d_v = d_u + weights[a]
+                if d_v < dist[v]:
+                    dist[v] = d_v
+                    parent[v] = a
+                    heapq.heappush(heap, (d_v, v))
+        self.last_affected = len(touched)
+
+    def route(self, end: str) -> Tuple[Optional[List[str]], float]:
+        """Đường đi source -> end theo cây hiện tại, output giống a_star_search."""
+        self.refresh()
+        graph = self.graph
+        if end not in graph.index:
+            return None, float('inf')
+
+        t = graph.index[end]
+        if self.dist[t] == float('inf'):
+            return None, float('inf')
+
+        s = graph.index[self.source]
+        path = [t]
+        v = t
+        while v != s:
+            v = graph.arc_from[self.parent[v]]
+            path.append(v)
+        path.reverse()
+        return [graph.ids[i] for i in path], self.dist[t]
@@ -1,13 +1,17 @@
 #Thuật toán Fleury và Hierholzer
 
 import copy
+from core.graph import CSRGraph
 
 def find_euler_path(adj_list):
     """
     Tìm chu trình hoặc đường đi Euler dùng thuật toán Hierholzer.
-    Input: adj_list (dict): {u: [v1, v2, ...]} hoặc {u: [(v1, w), ...]}
+    Input: adj_list (dict): {u: [v1, v2, ...]} hoặc {u: [(v1, w), ...]}, hoặc CSRGraph
     Output: list nodes [u, v, ..., k] hoặc None nếu không có.
     """
+    if isinstance(adj_list, CSRGraph):
+        # Lấy thẳng đoạn targets của từng đỉnh, không qua tuple (v, w)
+        adj_list = {u: list(adj_list.neighbors(u)) for u in range(adj_list.num_nodes)}
     
     # 1. Chuẩn hóa adj_list (bỏ trọng số nếu có) & Đếm bậc
     graph = {}
@@ -1,6 +1,7 @@
-#Thuật toán Ford-Fulkerson
+#Thuật toán Ford-Fulkerson (ma trận), Dinic và Push-Relabel (danh sách kề thưa)
 
 from collections import deque
+from core.graph import CSRGraph
 
 class MaxFlow: 
     def __init__(self, graph):
@@ -9,14 +10,14 @@ class MaxFlow:
 
     def bfs(self, residual_graph, s, t, parent):
         visited = [False] * self.n
-        queue = []
+        queue = deque()
         
         queue.append(s)
         visited[s] = True
         parent[s] = -1
         
         while queue:
-            u = queue.pop(0)
+            u = queue.popleft()
             
             for v in range(self.n):
                 # Kiểm tra trên residual_graph 
@@ -70,4 +71,468 @@ class MaxFlow:
             # Reset parent cho vòng lặp sau
             parent = [-1] * self.n
 
-        return max_flow, flow_matrix
\ No newline at end of file
+        return max_flow, flow_matrix
+
+
+# =====================================================================
+# MẠNG THẶNG DƯ THƯA + DINIC
+# =====================================================================
+class FlowNetwork:
+    """
+    Mạng thặng dư (residual network) lưu dạng danh sách kề thưa.
+    Cạnh thứ k gồm 2 cung ghép cặp: 2k (xuôi) và 2k+1 (ngược),
+    nên cung ngược của cung a luôn là a ^ 1 (không cần tra cứu).
+    Bộ nhớ O(V + E) thay vì ma trận n x n.
+    """
+    def __init__(self, n: int):
+        self.n = n
+        self.adj = [[] for _ in range(n)]   # Chỉ số các cung đi ra của từng đỉnh
+        self.to = []                        # Đỉnh đích của cung
+        self.cap = []                       # Dung lượng thặng dư hiện tại của cung
+        self.base = []                      # Dung lượng gốc của cung
+        self.two_way = bytearray()          # Cạnh k là đường 2 chiều (giữ cả khi dung lượng = 0)
+
+    def add_edge(self, u: int, v: int, cap, rev_cap=0, two_way=None) -> int:
+        """
+        Thêm cạnh u -> v dung lượng cap. Đường 2 chiều: rev_cap = cap.
+        two_way: đánh dấu đường 2 chiều (mặc định suy từ rev_cap > 0); cần truyền
+        rõ khi dung lượng có thể bằng 0 để lần sửa dung lượng sau giữ đúng 2 chiều.
+        Trả về chỉ số cạnh k (cung xuôi 2k, cung ngược 2k+1).
+        """
+        k = len(self.to) // 2
+        self.adj[u].append(2 * k)
+        self.to.append(v)
+        self.cap.append(cap)
+        self.base.append(cap)
+
+        self.adj[v].append(2 * k + 1)
+        self.to.append(u)
+        self.cap.append(rev_cap)
+        self.base.append(rev_cap)
+        self.two_way.append(1 if (rev_cap > 0 if two_way is None else two_way) else 0)
+        return k
+
+    @classmethod
+    def from_edges(cls, n: int, edges, directed: bool = True):
+        """edges: [(u, v, capacity), ...]. Cạnh thứ k của input = cạnh k của mạng."""
+        net = cls(n)
+        for u, v, c in edges:
+            net.add_edge(u, v, c, 0 if directed else c, two_way=not directed)
+        return net
+
+    @classmethod
+    def from_csr(cls, csr: CSRGraph):
+        """Dựng mạng từ snapshot CSR; chỉ số cạnh trùng csr.edge_ids (cạnh gốc)."""
+        m = max(csr.edge_ids) + 1 if csr.num_arcs() else 0
+        ends = [None] * m
+        for u in range(csr.num_nodes):
+            for i in csr.out_range(u):
+                k = csr.edge_ids[i]
+                if ends[k] is None:
+                    ends[k] = (u, csr.targets[i], csr.weights[i])
+        # Chỉ số bị bỏ trống (cạnh lỗi) -> cạnh giả dung lượng 0 để giữ đúng vị trí
+        edges = [e if e is not None else (0, 0, 0) for e in ends]
+        return cls.from_edges(csr.num_nodes, edges, csr.directed)
+
+    def add_node(self) -> int:
+        self.adj.append([])
+        self.n += 1
+        return self.n - 1
+
+    def num_edges(self):
+        return len(self.to) // 2
+
+    def net_outflow(self, u):
+        """Tổng luồng ra trừ luồng vào tại u, O(bậc của u)."""
+        base, cap = self.base, self.cap
+        return sum(base[a] - cap[a] for a in self.adj[u])
+
+    def edge_flow(self, k: int):
+        """Luồng ròng trên cạnh k (âm nếu chảy ngược trên đường 2 chiều)."""
+        return self.base[2 * k] - self.cap[2 * k]
+
+    def flows(self):
+        """Mảng luồng thưa theo cạnh: flows[k] = luồng trên cạnh k."""
+        base, cap = self.base, self.cap
+        return [base[a] - cap[a] for a in range(0, len(cap), 2)]
+
+    def reset(self):
+        self.cap = list(self.base)
+
+    def min_cut(self, s):
+        """
+        Lát cắt s-t nhỏ nhất từ luồng cực đại hiện có trong mạng, O(V + E).
+        Output: (source_side, cut_edges)
+                - source_side: bytearray, 1 nếu đỉnh còn tới được từ s trên mạng thặng dư
+                - cut_edges: danh sách chỉ số cạnh k đi từ phía s sang phía t
+        """
+        adj, to, cap, base = self.adj, self.to, self.cap, self.base
+        side = bytearray(self.n)
+        side[s] = 1
+        queue = deque([s])
+        while queue:
+            u = queue.popleft()
+            for a in adj[u]:
+                v = to[a]
+                if not side[v] and cap[a] > 0:
+                    side[v] = 1
+                    queue.append(v)
+
+        cut_edges = []
+        for a in range(len(to)):
+            # Cung a đi từ to[a ^ 1] tới to[a]; chỉ tính cung có dung lượng gốc
+            if base[a] > 0 and side[to[a ^ 1]] and not side[to[a]]:
+                cut_edges.append(a // 2)
+        return side, cut_edges
+
+
+class DinicMaxFlow:
+    """
+    Thuật toán Dinic: đồ thị phân tầng (BFS) + luồng chặn (DFS lặp, không đệ quy).
+    Độ phức tạp O(V^2 * E), thực tế nhanh hơn nhiều trên mạng đường phố.
+    """
+    def __init__(self, network: FlowNetwork):
+        self.net = network
+        self.level = [-1] * network.n
+
+    def bfs_level(self, s, t):
+        """Gán tầng cho các đỉnh đi tới được từ s trên mạng thặng dư."""
+        net = self.net
+        adj, to, cap = net.adj, net.to, net.cap
+        level = [-1] * net.n
+        level[s] = 0
+        queue = deque([s])
+
+        while queue:
+            u = queue.popleft()
+            if level[t] >= 0 and level[u] >= level[t]:
+                # Các đỉnh cùng tầng/xa hơn t không nằm trên đường ngắn nhất tới t
+                break
+            next_level = level[u] + 1
+            for a in adj[u]:
+                v = to[a]
+                if level[v] < 0 and cap[a] > 0:
+                    level[v] = next_level
+                    queue.append(v)
+
+        self.level = level
+        return level[t] >= 0
+
+    def blocking_flow(self, s, t, limit=float("inf")):
+        """Tìm luồng chặn trên đồ thị phân tầng hiện tại (tối đa limit)."""
+        net = self.net
+        adj, to, cap = net.adj, net.to, net.cap
+        level = self.level
+        it = [0] * net.n        # Con trỏ cung hiện tại của từng đỉnh
+        path = []               # Các cung trên đường đang xét từ s
+        total = 0
+        u = s
+
+        while total < limit:
+            if u == t:
+                # Bước A: độ thắt cổ chai của đường s -> t
+                f = limit - total
+                for a in path:
+                    if cap[a] < f:
+                        f = cap[a]
+
+                # Bước B: cập nhật cung xuôi/ngược, nhớ cung bão hòa đầu tiên
+                cut = -1
+                for i, a in enumerate(path):
+                    cap[a] -= f
+                    cap[a ^ 1] += f
+                    if cut < 0 and cap[a] <= 0:
+                        cut = i
+                total += f
+                if cut < 0:
+                    break
+
+                # Lùi về đỉnh đầu của cung bão hòa đầu tiên
+                del path[cut:]
+                u = to[path[-1]] if path else s
+                continue
+
+            arcs = adj[u]
+            i = it[u]
+            next_level = level[u] + 1
+            while i < len(arcs):
+                a = arcs[i]
+                if cap[a] > 0 and level[to[a]] == next_level:
+                    break
+                i += 1
+            it[u] = i
+
+            if i < len(arcs):
+                # Tiến
+                a = arcs[i]
+                path.append(a)
+                u = to[a]
+            else:
+                # Lùi: u là ngõ cụt trong tầng này
+                if u == s:
+                    break
+                level[u] = -1
+                a = path.pop()
+                u = to[a ^ 1]
+                it[u] += 1
+
+        return total
+
+    def augment(self, s, t, limit=float("inf")):
+        """
+        Đẩy thêm tối đa `limit` đơn vị từ s tới t, tiếp tục từ luồng đang có
+        trong mạng (không reset). Trả về lượng đã đẩy được.
+        """
+        total = 0
+        if s != t:
+            while total < limit and self.bfs_level(s, t):
+                total += self.blocking_flow(s, t, limit - total)
+        return total
+
+    def max_flow(self, s, t, limit=float("inf")):
+        """
+        Trả về (max_flow, flow) giống MaxFlow.ford_fulkerson, nhưng flow là
+        mảng thưa theo cạnh (flow[k] = luồng trên cạnh k) thay vì ma trận n x n.
+        Chạy tiếp từ luồng đang có trong mạng (không tự reset).
+        """
+        return self.augment(s, t, limit), self.net.flows()
+
+
+class PushRelabelMaxFlow:
+    """
+    Push-Relabel chọn đỉnh có nhãn cao nhất (highest-label), kèm 2 heuristic:
+    - Gap: khi không còn đỉnh nào ở độ cao h, mọi đỉnh cao hơn h không thể
+      tới đích nữa -> nâng thẳng lên giới hạn.
+    - Global relabel: định kỳ gán lại độ cao = khoảng cách BFS tới đích.
+    Pha 1 đẩy luồng về t (cho giá trị luồng cực đại), pha 2 trả phần dư về s
+    để mạng chứa một luồng hợp lệ (dùng được cho flows() và min_cut()).
+    Thường tốt hơn đường tăng luồng trên lưới đô thị dày, nhiều tuyến song song.
+    """
+    def __init__(self, network: FlowNetwork):
+        self.net = network
+        n = network.n
+        self.height = [0] * n
+        self.excess = [0] * n
+
+    def _global_relabel(self, target, blocked, limit):
+        # BFS ngược từ target: height[u] = số cung thặng dư ít nhất từ u tới target
+        net = self.net
+        adj, to, cap = net.adj, net.to, net.cap
+        height = self.height
+        for i in range(net.n):
+            height[i] = limit
+        height[target] = 0
+        queue = deque([target])
+        while queue:
+            v = queue.popleft()
+            h = height[v] + 1
+            for a in adj[v]:
+                u = to[a]
+                if height[u] == limit and u != blocked and cap[a ^ 1] > 0:
+                    height[u] = h
+                    queue.append(u)
+
+    def _run_phase(self, target, blocked, limit):
+        """Đẩy hết phần dư của các đỉnh có độ cao < limit về phía target."""
+        net = self.net
+        n = net.n
+        adj, to, cap = net.adj, net.to, net.cap
+        height, excess = self.height, self.excess
+
+        def rebuild():
+            # Dựng lại các thùng (bucket) đỉnh hoạt động và bộ đếm độ cao
+            self._global_relabel(target, blocked, limit)
+            buckets = [[] for _ in range(limit + 1)]
+            count = [0] * (limit + 1)
+            for v in range(n):
+                count[height[v]] += 1
+                if excess[v] > 0 and v != target and v != blocked and height[v] < limit:
+                    buckets[height[v]].append(v)
+            return buckets, count
+
+        buckets, count = rebuild()
+        current = [0] * n
+        hmax = limit - 1
+        relabels = 0
+
+        while hmax >= 0:
+            if not buckets[hmax]:
+                hmax -= 1
+                continue
+            u = buckets[hmax].pop()
+            if height[u] != hmax or excess[u] <= 0:
+                continue
+
+            # --- Discharge u ---
+            arcs = adj[u]
+            while excess[u] > 0:
+                i = current[u]
+                if i == len(arcs):
+                    # Relabel: độ cao mới = 1 + độ cao thấp nhất của đỉnh kề còn cung thặng dư
+                    old = height[u]
+                    new_h = limit
+                    for a in arcs:
+                        if cap[a] > 0 and height[to[a]] + 1 < new_h:
+                            new_h = height[to[a]] + 1
+                    count[old] -= 1
+                    if count[old] == 0 and old < new_h:
+                        # Gap heuristic
+                        for v in range(n):
+                            if old < height[v] < limit:
+                                count[height[v]] -= 1
+                                height[v] = limit
+                                count[limit] += 1
+                        new_h = limit
+                    height[u] = new_h
+                    count[new_h] += 1
+                    current[u] = 0
+                    relabels += 1
+                    if new_h >= limit:
+                        break
+                    if new_h > hmax:
+                        # Các lần push sau sẽ đổ vào thùng new_h - 1, phải nằm trong tầm quét
+                        hmax = new_h
+                    continue
+
+                a = arcs[i]
+                v = to[a]
+                if cap[a] > 0 and height[u] == height[v] + 1:
+                    # Push
+                    d = excess[u] if excess[u] < cap[a] else cap[a]
+                    cap[a] -= d
+                    cap[a ^ 1] += d
+                    if excess[v] == 0 and v != target and v != blocked:
+                        buckets[height[v]].append(v)
+                    excess[u] -= d
+                    excess[v] += d
+                else:
+                    current[u] = i + 1
+
+            if relabels >= n:
+                # Global relabel định kỳ
+                relabels = 0
+                buckets, count = rebuild()
+                current = [0] * n
+                hmax = limit - 1
+
+    def max_flow(self, s, t):
+        """Trả về (max_flow, flow) giống DinicMaxFlow (flow là mảng thưa theo cạnh)."""
+        net = self.net
+        n = net.n
+        if s == t:
+            return 0, net.flows()
+
+        adj, to, cap = net.adj, net.to, net.cap
+        excess = self.excess
+        for i in range(n):
+            excess[i] = 0
+
+        # Tiền luồng: bão hòa mọi cung đi ra từ s
+        for a in adj[s]:
+            d = cap[a]
+            if d > 0:
+                cap[a] = 0
+                cap[a ^ 1] += d
+                excess[to[a]] += d
+                excess[s] -= d
+
+        # Pha 1: đẩy về t (độ cao < n). Pha 2: trả phần dư về s (độ cao < 2n)
+        self._run_phase(t, s, n)
+        self._run_phase(s, t, 2 * n)
+        return excess[t], net.flows()
+
+
+class FlowSession:
+    """
+    Phiên luồng cực đại có trạng thái: giữ nguyên mạng thặng dư giữa các lần
+    chạy để phân tích "what-if". Đổi dung lượng 1 tuyến đường chỉ sửa cục bộ:
+    - Tăng: tìm thêm đường tăng luồng từ luồng hiện có.
+    - Giảm dưới mức luồng đang chạy: nắn phần dư đi vòng u -> v, phần không
+      nắn được thì hủy (trả về s / rút khỏi t), rồi tăng luồng lại nếu được.
+    Không phải tính lại từ luồng 0.
+    """
+    def __init__(self, network: FlowNetwork, s, t, engine="dinic"):
+        self.net = network
+        self.s = s
+        self.t = t
+        self._dinic = DinicMaxFlow(network)
+
+        if engine not in FLOW_ENGINES:
+            raise ValueError(f"Engine luồng không hợp lệ: {engine}")
+        FLOW_ENGINES[engine](network).max_flow(s, t)
+        self.value = -network.net_outflow(t)
+
+    def flows(self):
+        return self.net.flows()
+
+    def min_cut(self):
+        return self.net.min_cut(self.s)
+
+    def add_node(self) -> int:
+        return self.net.add_node()
+
+    def add_edge(self, u, v, capacity, two_way=False):
+        """Thêm tuyến mới rồi tăng luồng nếu có đường mới. Trả về chỉ số cạnh."""
+        k = self.net.add_edge(u, v, capacity, capacity if two_way else 0, two_way)
+        self._refresh()
+        return k
+
+    def set_capacity(self, k, capacity):
+        """Đổi dung lượng cạnh k và sửa luồng cục bộ. Trả về luồng cực đại mới."""
+        net = self.net
+        a, b = 2 * k, 2 * k + 1
+        # Cạnh 2 chiều giữ dung lượng ngược = dung lượng xuôi khi sửa
+        rev_capacity = capacity if net.two_way[k] else 0
+
+        # Chiều đang mang luồng (x) và lượng luồng trên chiều đó
+        f = net.base[a] - net.cap[a]
+        if f >= 0:
+            x, fx, limit_x = a, f, capacity
+        else:
+            x, fx, limit_x = b, -f, rev_capacity
+
+        excess = fx - limit_x if fx > limit_x else 0
+        if excess:
+            fx = limit_x
+        f = fx if x == a else -fx
+
+        net.base[a], net.base[b] = capacity, rev_capacity
+        net.cap[a] = capacity - f
+        net.cap[b] = rev_capacity + f
+
+        if excess:
+            # Đỉnh u thừa `excess` đơn vị, đỉnh v thiếu `excess` đơn vị
+            u, v = net.to[x ^ 1], net.to[x]
+            moved = self._dinic.augment(u, v, excess)
+            remaining = excess - moved
+            if remaining:
+                if u != self.s and u != self.t:
+                    self._dinic.augment(u, self.s, remaining)
+                if v != self.s and v != self.t:
+                    self._dinic.augment(self.t, v, remaining)
+
+        self._refresh()
+        return self.value
+
+    def _refresh(self):
+        self._dinic.augment(self.s, self.t)
+        self.value = -self.net.net_outflow(self.t)
+
+
+# Các engine luồng cực đại có thể chọn (đều chạy trên FlowNetwork)
+FLOW_ENGINES = {
+    "dinic": DinicMaxFlow,
+    "push_relabel": PushRelabelMaxFlow,
+}
+
+
+def solve_max_flow(network: FlowNetwork, s, t, engine="dinic"):
+    """
+    Chạy luồng cực đại bằng engine đã chọn ("dinic" hoặc "push_relabel").
+    Output: (max_flow, flow, cut_edges) - cut_edges là các cạnh của lát cắt nhỏ nhất.
+    """
+    if engine not in FLOW_ENGINES:
+        raise ValueError(f"Engine luồng không hợp lệ: {engine}")
+    max_val, flows = FLOW_ENGINES[engine](network).max_flow(s, t)
+    _, cut_edges = network.min_cut(s)
+    return max_val, flows, cut_edges
@@ -0,0 +1,70 @@
+#Vùng tới được trong 1 ngân sách chi phí (isochrone), hỗ trợ nhiều điểm xuất phát
+
+from typing import Dict, List, Tuple
+from algorithms.shortest_path import TrafficGraph, shortest_path_tree
+
+class Isochrone:
+    """
+    Kết quả vùng tới được:
+    - reached: {ID đỉnh: chi phí nhỏ nhất từ nguồn gần nhất} (chỉ đỉnh <= budget).
+    - covered: [(u, v, fraction)] mọi cung đi được từ đỉnh tới được; fraction = 1
+      nếu đi hết cung, < 1 nếu chỉ đi được 1 phần (tính từ u) trước khi hết ngân sách.
+    - frontier: các cung đi dở (fraction < 1) - ranh giới của vùng.
+    - cut_points: tọa độ (x, y) điểm dừng trên từng cung của frontier (nội suy thẳng).
+    Canvas có thể tô vùng trực tiếp từ covered, không cần duyệt lại đồ thị.
+    """
+    __slots__ = ("budget", "reached", "covered", "frontier", "cut_points")
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.reached: Dict[str, float] = {}
+        self.covered: List[Tuple[str, str, float]] = []
+        self.frontier: List[Tuple[str, str, float]] = []
+        self.cut_points: List[Tuple[float, float]] = []
+
+def isochrone(graph: TrafficGraph, sources: List[str], budget: float,
+              mode: str = 'time') -> Isochrone:
+    """
+    Dijkstra nhiều nguồn dừng khi vượt ngân sách `budget` (theo mode).
+    Output: Isochrone (đỉnh tới được, cung đi hết / đi dở, điểm cắt).
+    """
+    missing = [x for x in sources if x not in graph.index]
+    if missing:
+        raise ValueError(f"Đỉnh không tồn tại: {missing[0]}")
+
+    result = Isochrone(budget)
+    if budget < 0 or not sources:
+        return result
+
+    dist, _ = shortest_path_tree(graph, [graph.index[x] for x in sources], mode, budget=budget)
+
+    ids, xs, ys = graph.ids, graph.xs, graph.ys
+    weights = graph.weights(mode)
+    offsets, arcs = graph.out_index()
+    arc_to = graph.arc_to
+
+    for u in range(graph.num_nodes()):
+        d_u = dist[u]
+        if d_u > budget:
+            continue
+        result.reached[ids[u]] = d_u
+
+        left = budget - d_u
+        for i in range(offsets[u], offsets[u + 1]):
+            a = arcs[i]
+            v = arc_to[a]
+            w = weights[a]
+            if w <= left:
+                result.covered.append((ids[u], ids[v], 1.0))
+                continue
+
+            fraction = left / w
+            if fraction <= 0:
+                continue
+            arc = (ids[u], ids[v], fraction)
+            result.covered.append(arc)
+            result.frontier.append(arc)
+            result.cut_points.append((xs[u] + (xs[v] - xs[u]) * fraction,
+                                      ys[u] + (ys[v] - ys[u]) * fraction))
+
+    return result
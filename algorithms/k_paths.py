@@ -0,0 +1,186 @@
+#K lộ trình thay thế: K đường đi ngắn nhất không lặp (Yen) và chế độ phạt (đường đa dạng)
+
+import heapq
+from array import array
+from typing import List, Tuple, Optional
+from algorithms.shortest_path import TrafficGraph, shortest_path_tree
+
+INF = float('inf')
+
+def _search(graph: TrafficGraph, weights, s: int, t: int, h, removed=(), blocked=(),
+            bound: float = INF) -> Optional[Tuple[List[int], float]]:
+    # A* từ s tới t bỏ qua các cung removed / đỉnh blocked, h là cận dưới chi phí về t.
+    # Bỏ cuộc khi f vượt bound (không thể cho đường tốt hơn mức cần).
+    offsets, arcs = graph.out_index()
+    arc_from, arc_to = graph.arc_from, graph.arc_to
+    g = {s: 0.0}
+    came = {}
+    heap = [(h[s], 0.0, s)]
+    while heap:
+        f, d_u, u = heapq.heappop(heap)
+        if f > bound:
+            return None
+        if u == t:
+            path = []
+            while u != s:
+                a = came[u]
+                path.append(a)
+                u = arc_from[a]
+            path.reverse()
+            return path, d_u
+        if d_u > g[u]:
+            continue
+        for i in range(offsets[u], offsets[u + 1]):
+            a = arcs[i]
+            v = arc_to[a]
+            if a in removed or v in blocked or h[v] == INF:
+                continue
+            d_v = d_u + weights[a]
+            if d_v < g.get(v, INF):
+                g[v] = d_v
+                came[v] = a
+                heapq.heappush(heap, (d_v + h[v], d_v, v))
+    return None
+
+def _to_ids(graph: TrafficGraph, s: int, arcs) -> List[str]:
+    return [graph.ids[s]] + [graph.ids[graph.arc_to[a]] for a in arcs]
+
+def _parallel_arcs(graph: TrafficGraph, u: int, v: int):
+    # Mọi cung u -> v (đường song song cho cùng 1 dãy đỉnh với người lái)
+    offsets, arcs = graph.out_index()
+    arc_to = graph.arc_to
+    return [arcs[i] for i in range(offsets[u], offsets[u + 1]) if arc_to[arcs[i]] == v]
+
+def k_shortest_paths(graph: TrafficGraph, start: str, end: str, k: int = 3,
+                     mode: str = 'time') -> List[Tuple[List[str], float]]:
+    """
+    K đường đi ngắn nhất không lặp đỉnh (thuật toán Yen), tăng dần theo chi phí.
+    Dùng lại công sức tìm kiếm:
+    - 1 cây đường đi ngắn nhất ngược từ end (tính 1 lần) cho: đường thứ nhất,
+      cận dưới chính xác h(v) = d(v, end) làm heuristic A* cho mọi lượt spur,
+      và lối tắt: nếu đường trên cây từ đỉnh spur không đụng cung/đỉnh bị cấm thì
+      đó chính là đường spur tối ưu, khỏi tìm.
+    - Chỉ rẽ nhánh từ vị trí đường trước đã rẽ trở đi (cải tiến Lawler).
+    - Cắt tỉa: khi đã đủ ứng viên, bỏ spur có chi phí gốc + h(spur) không thể lọt top.
+    Các đường khác nhau theo DÃY ĐỈNH: tuyến song song giữa 2 đỉnh chỉ tính 1 lần
+    (lấy tuyến rẻ nhất).
+    Output: [(path, cost)] (mỗi phần tử giống output a_star_search), tối đa k đường.
+    """
+    if start not in graph.index or end not in graph.index or k <= 0:
+        return []
+
+    s, t = graph.index[start], graph.index[end]
+    weights = graph.weights(mode)
+    arc_from, arc_to = graph.arc_from, graph.arc_to
+    h, next_arc = shortest_path_tree(graph, t, mode, reverse=True)
+    if h[s] == INF:
+        return []
+
+    def tree_path(v):
+        path = []
+        while v != t:
+            a = next_arc[v]
+            path.append(a)
+            v = arc_to[a]
+        return path
+
+    def node_seq(arcs):
+        return (s,) + tuple(arc_to[a] for a in arcs)
+
+    # Đường đã chọn: (cost, arcs, chỉ số rẽ nhánh)
+    accepted = [(h[s], tuple(tree_path(s)), 0)]
+    candidates = []     # Heap ứng viên (cost, arcs, chỉ số rẽ nhánh)
+    seen = {node_seq(accepted[0][1])}
+
+    while len(accepted) < k:
+        _, prev, dev = accepted[-1]
+        nodes = node_seq(prev)
+        root_cost = sum(weights[a] for a in prev[:dev])
+
+        for i in range(dev, len(prev)):
+            spur = nodes[i]
+            root = prev[:i]
+
+            # Cắt tỉa: ứng viên tệ nhất còn có thể được chọn
+            need = k - len(accepted)
+            if len(candidates) >= need:
+                bound = heapq.nsmallest(need, candidates)[-1][0]
+                if root_cost + h[spur] >= bound:
+                    root_cost += weights[prev[i]]
+                    continue
+            else:
+                bound = INF
+
+            # Cấm mọi cung (kể cả song song) từ spur tới đỉnh kế của các đường đã chọn
+            # có cùng dãy đỉnh gốc
+            next_nodes = {arc_to[p[i]] for _, p, _ in accepted
+                          if len(p) > i and node_seq(p[:i]) == nodes[:i + 1]}
+            removed = {a for v in next_nodes for a in _parallel_arcs(graph, spur, v)}
+            blocked = set(nodes[:i])
+
+            # Lối tắt: đường trên cây ngược từ spur không đụng gì bị cấm
+            spur_arcs, spur_cost = None, INF
+            path = tree_path(spur)
+            if h[spur] != INF and not any(a in removed or arc_to[a] in blocked for a in path):
+                spur_arcs, spur_cost = path, h[spur]
+            else:
+                found = _search(graph, weights, spur, t, h, removed, blocked, bound - root_cost)
+                if found is not None:
+                    spur_arcs, spur_cost = found
+
+            if spur_arcs is not None:
+                total = root + tuple(spur_arcs)
+                key = node_seq(total)
+                if key not in seen:
+                    seen.add(key)
+                    heapq.heappush(candidates, (root_cost + spur_cost, total, i))
+
+            root_cost += weights[prev[i]]
+
+        if not candidates:
+            break
+        accepted.append(heapq.heappop(candidates))
+
+    return [(_to_ids(graph, s, arcs), cost) for cost, arcs, _ in accepted]
+
+def diverse_routes(graph: TrafficGraph, start: str, end: str, k: int = 3,
+                   mode: str = 'time', penalty: float = 1.4,
+                   max_rounds: Optional[int] = None) -> List[Tuple[List[str], float]]:
+    """
+    Lộ trình thay thế kiểu phạt (rẻ hơn Yen trên bản đồ lớn, các đường khác nhau rõ rệt):
+    sau mỗi lần tìm, nhân trọng số các cung vừa dùng với `penalty` rồi tìm lại.
+    Cận dưới d(v, end) trên đồ thị gốc vẫn hợp lệ vì trọng số chỉ tăng, nên mọi lượt
+    dùng chung 1 cây ngược làm heuristic A*.
+    Tuyến song song bị phạt cùng nhau và đường trùng dãy đỉnh chỉ lấy 1 lần.
+    Output: [(path, cost thật - theo trọng số gốc)], tối đa k đường khác nhau.
+    """
+    if start not in graph.index or end not in graph.index or k <= 0:
+        return []
+    if penalty <= 1:
+        raise ValueError("penalty phải > 1")
+
+    s, t = graph.index[start], graph.index[end]
+    weights = graph.weights(mode)
+    h, _ = shortest_path_tree(graph, t, mode, reverse=True)
+    if h[s] == INF:
+        return []
+
+    arc_from, arc_to = graph.arc_from, graph.arc_to
+    penalized = array('d', weights)
+    routes, seen = [], set()
+    for _ in range(max_rounds or 3 * k):
+        found = _search(graph, penalized, s, t, h)
+        if found is None:
+            break
+        arcs, _ = found
+        key = tuple(arc_to[a] for a in arcs)
+        if key not in seen:
+            seen.add(key)
+            routes.append((_to_ids(graph, s, arcs), sum(weights[a] for a in arcs)))
+            if len(routes) == k:
+                break
+        for a in arcs:
+            for b in _parallel_arcs(graph, arc_from[a], arc_to[a]):
+                penalized[b] *= penalty
+
+    return routes
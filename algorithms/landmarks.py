@@ -0,0 +1,139 @@
+#Heuristic ALT (A*, Landmarks, bất đẳng thức Tam giác) cho tìm đường
+
+from array import array
+from typing import List
+from algorithms.shortest_path import TrafficGraph, shortest_path_tree
+
+INF = float('inf')
+
+class Landmarks:
+    """
+    Chọn k đỉnh mốc (landmark) L và tính trước cho từng mốc:
+    - from_lm[i][v] = d(L_i, v)  (Dijkstra xuôi từ L_i)
+    - to_lm[i][v]   = d(v, L_i)  (Dijkstra ngược về L_i)
+    Theo bất đẳng thức tam giác, với mọi u, v:
+        d(u, v) >= d(u, L) - d(v, L)   và   d(u, v) >= d(L, v) - d(L, u)
+    nên lower_bound(u, v) là heuristic chấp nhận được (và nhất quán) cho A*.
+    Khoảng cách tính theo 1 mode ('time' / 'distance'); đồ thị đổi thì phải dựng lại
+    (kiểm tra bằng is_current()).
+
+    strategy:
+    - 'farthest': mốc mới là đỉnh xa các mốc đã chọn nhất.
+    - 'avoid': mốc mới nằm ở vùng mà các mốc hiện có cho cận dưới kém nhất
+      (cây đường đi ngắn nhất từ 1 gốc, chọn nhánh có tổng "độ hụt" lớn nhất).
+    """
+    def __init__(self, graph: TrafficGraph, k: int = 8, mode: str = 'time',
+                 strategy: str = 'farthest'):
+        if strategy not in ('farthest', 'avoid'):
+            raise ValueError(f"Chiến lược chọn mốc không hợp lệ: {strategy}")
+
+        self.graph = graph
+        self.mode = mode
+        self.strategy = strategy
+        self.version = graph.version
+        self.landmarks: List[int] = []
+        self.from_lm: List[array] = []
+        self.to_lm: List[array] = []
+
+        n = graph.num_nodes()
+        k = min(k, n)
+        for _ in range(k):
+            if strategy == 'avoid' and self.landmarks:
+                lm = self._pick_avoid()
+            else:
+                lm = self._pick_farthest()
+            if lm is None:
+                break
+            self._add_landmark(lm)
+
+    def _add_landmark(self, lm: int) -> None:
+        self.landmarks.append(lm)
+        self.from_lm.append(shortest_path_tree(self.graph, lm, self.mode)[0])
+        self.to_lm.append(shortest_path_tree(self.graph, lm, self.mode, reverse=True)[0])
+
+    def is_current(self) -> bool:
+        """Bảng khoảng cách còn khớp với đồ thị (chưa bị sửa từ lúc dựng)."""
+        return self.version == self.graph.version
+
+    def _pick_farthest(self):
+        n = self.graph.num_nodes()
+        if not self.landmarks:
+            # Mốc đầu: đỉnh xa nhất tính từ đỉnh 0 (thường nằm ở rìa bản đồ)
+            if n == 0:
+                return None
+            dist = shortest_path_tree(self.graph, 0, self.mode)[0]
+            return max(range(n), key=lambda v: (dist[v] != INF, dist[v]))
+
+        chosen = set(self.landmarks)
+        best, best_score = None, -1.0
+        for v in range(n):
+            if v in chosen:
+                continue
+            # Khoảng cách (2 chiều) tới mốc gần nhất; inf = thành phần chưa có mốc
+            score = min(min(f[v], t[v]) for f, t in zip(self.from_lm, self.to_lm))
+            if score > best_score:
+                best, best_score = v, score
+        return best
+
+    def _pick_avoid(self):
+        graph = self.graph
+        n = graph.num_nodes()
+
+        # Gốc: đỉnh xa các mốc hiện có nhất
+        root = self._pick_farthest()
+        if root is None:
+            return None
+        dist, parent = shortest_path_tree(graph, root, self.mode)
+
+        # Độ hụt của cận dưới tại mỗi đỉnh: d(root, v) - lb(root, v)
+        weight = [0.0] * n
+        for v in range(n):
+            if dist[v] != INF:
+                weight[v] = dist[v] - self.lower_bound(root, v)
+
+        # Cộng dồn theo cây từ lá lên gốc (duyệt đỉnh theo dist giảm dần);
+        # nhánh nào đã chứa mốc thì coi như đã được phủ (size = 0)
+        order = sorted((v for v in range(n) if dist[v] != INF), key=lambda v: -dist[v])
+        size = weight[:]
+        covered = bytearray(n)
+        for lm in self.landmarks:
+            covered[lm] = 1
+        children = [[] for _ in range(n)]
+        for v in order:
+            a = parent[v]
+            if a < 0:
+                continue
+            p = graph.arc_from[a]
+            children[p].append(v)
+            if covered[v]:
+                covered[p] = 1
+            else:
+                size[p] += size[v]
+        for v in order:
+            if covered[v]:
+                size[v] = 0.0
+
+        # Đi từ gốc xuống theo con có size lớn nhất cho tới lá
+        v = root
+        while True:
+            best = max(children[v], key=lambda c: size[c], default=None)
+            if best is None or size[best] <= 0:
+                break
+            v = best
+        return None if v in self.landmarks else v
+
+    def lower_bound(self, u: int, v: int) -> float:
+        """Cận dưới d(u, v) (chỉ số đỉnh) theo bất đẳng thức tam giác, dùng cho A*."""
+        best = 0.0
+        for to, frm in zip(self.to_lm, self.from_lm):
+            a = to[v]
+            if a != INF:
+                b = to[u] - a
+                if b > best:
+                    best = b
+            a = frm[u]
+            if a != INF:
+                b = frm[v] - a
+                if b > best:
+                    best = b
+        return best
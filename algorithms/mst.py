@@ -1,16 +1,24 @@
 #Thuật toán Prim và Kruskal
 
+import heapq
+import numpy as np
+from core.graph import CSRGraph
+
 # --- PHẦN 1: THUẬT TOÁN KRUSKAL ---
 class KruskalSolver:
+    """Union-Find: gộp theo hạng (rank) + nén đường kiểu path halving, không đệ quy."""
     def __init__(self, num_nodes):
         self.V = num_nodes
         self.parent = list(range(num_nodes))
         self.rank = [0] * num_nodes
 
     def find(self, i):
-        if self.parent[i] == i:
-            return i
-        return self.find(self.parent[i])
+        parent = self.parent
+        while parent[i] != i:
+            # Path halving: trỏ i lên ông của nó rồi nhảy lên
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
 
     def union(self, x, y):
         root_x = self.find(x)
@@ -26,83 +34,316 @@ class KruskalSolver:
             return True
         return False
 
+def _edge_arrays(adj_list):
+    """
+    Tách cạnh (mỗi cạnh vô hướng 1 lần) thành 3 mảng song song u, v, w.
+    Output: (keys, us, vs, ws) - keys[i] là đỉnh gốc ứng với chỉ số i.
+    """
+    if isinstance(adj_list, CSRGraph):
+        n = adj_list.num_nodes
+        offsets = np.frombuffer(adj_list.offsets, dtype=np.int64)
+        us = np.repeat(np.arange(n, dtype=np.int64), np.diff(offsets))
+        vs = np.frombuffer(adj_list.targets, dtype=np.int32).astype(np.int64)
+        ws = np.frombuffer(adj_list.weights, dtype=np.float64)
+        keep = us < vs # Chỉ lấy 1 chiều để không bị trùng (0-1 và 1-0)
+        return range(n), us[keep], vs[keep], ws[keep]
+
+    keys = list(adj_list.keys())
+    index = {key: i for i, key in enumerate(keys)}
+    us, vs, ws = [], [], []
+    for u in adj_list:
+        for v, w in adj_list[u]:
+            if u < v:
+                us.append(index[u])
+                vs.append(index[v])
+                ws.append(w)
+    return keys, np.array(us, dtype=np.int64), np.array(vs, dtype=np.int64), np.array(ws, dtype=np.float64)
+
 def run_kruskal(adj_list):
     """
     Thuật toán Kruskal tìm cây khung cực tiểu
-    Input: adj_list (Danh sách kề)
+    Input: adj_list (Danh sách kề hoặc CSRGraph vô hướng)
     Output: (Danh sách cạnh MST, Tổng trọng số)
+    Đồ thị không liên thông -> rừng khung cực tiểu.
     """
-    # 1. Chuyển đổi danh sách kề thành danh sách cạnh [u, v, w]
-    edges = []
-    num_nodes = len(adj_list)
-    
-    # Duyệt để lấy cạnh (tránh trùng lặp vì đồ thị vô hướng)
-    seen_edges = set()
-    for u in adj_list:
-        for v, w in adj_list[u]:
-            if u < v: # Chỉ lấy 1 chiều để không bị trùng (0-1 và 1-0)
-                edges.append([u, v, w])
+    # 1. Cạnh lưu thành 3 mảng song song u / v / w
+    keys, us, vs, ws = _edge_arrays(adj_list)
+    num_nodes = len(keys)
     
-    # 2. Sắp xếp cạnh theo trọng số tăng dần
-    edges.sort(key=lambda x: x[2])
+    # 2. Sắp xếp cạnh theo trọng số tăng dần (argsort ổn định của numpy)
+    order = np.argsort(ws, kind="stable")
     
     solver = KruskalSolver(num_nodes)
+    parent, rank = solver.parent, solver.rank
+    us, vs, ws = us.tolist(), vs.tolist(), ws.tolist()
     mst_edges = []
     total_weight = 0
+    need = num_nodes - 1
     
-    # 3. Duyệt từng cạnh và nối lại
-    for u, v, w in edges:
-        if solver.union(u, v):
-            mst_edges.append((u, v)) # Lưu lại để vẽ
-            total_weight += w
+    # 3. Duyệt từng cạnh và nối lại (union-find viết gọn trong vòng lặp)
+    for i in order.tolist():
+        x = us[i]
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        y = vs[i]
+        while parent[y] != y:
+            parent[y] = parent[parent[y]]
+            y = parent[y]
+        if x == y:
+            continue
+
+        if rank[x] < rank[y]:
+            x, y = y, x
+        parent[y] = x
+        if rank[x] == rank[y]:
+            rank[x] += 1
+
+        mst_edges.append((keys[us[i]], keys[vs[i]])) # Lưu lại để vẽ
+        total_weight += ws[i]
+        if len(mst_edges) == need:
+            break # Đủ V-1 cạnh -> dừng sớm
             
     return mst_edges, total_weight
 
 # --- PHẦN 2: THUẬT TOÁN PRIM ---
-def run_prim(adj_list):
+def run_prim(adj_list, start_node=None):
     """
-    Thuật toán Prim tìm cây khung cực tiểu
-    Input: adj_list (Danh sách kề)
+    Thuật toán Prim tìm cây khung cực tiểu (dùng binary heap, O(E log V))
+    Input: adj_list (Danh sách kề hoặc CSRGraph vô hướng), start_node (mặc định: đỉnh đầu tiên)
     Output: (Danh sách cạnh MST, Tổng trọng số)
+    Đồ thị không liên thông -> rừng khung cực tiểu (mỗi thành phần 1 cây).
     """
-    num_nodes = len(adj_list)
-    if num_nodes == 0: return [], 0
-    
-    # Khởi tạo
-    key = {i: float('inf') for i in range(num_nodes)} # Trọng số nhỏ nhất để nối vào MST
-    parent = {i: -1 for i in range(num_nodes)}        # Đỉnh cha để truy vết
-    mst_set = {i: False for i in range(num_nodes)}    # Đánh dấu đỉnh đã vào MST
-    
-    # Bắt đầu từ đỉnh 0
-    key[0] = 0
+    is_csr = isinstance(adj_list, CSRGraph)
+    nodes = range(adj_list.num_nodes) if is_csr else list(adj_list.keys())
+    if len(nodes) == 0: return [], 0
     
-    for _ in range(num_nodes):
-        # Tìm đỉnh u có key nhỏ nhất chưa nằm trong MST
-        u = -1
-        min_val = float('inf')
-        
-        for i in range(num_nodes):
-            if not mst_set[i] and key[i] < min_val:
-                min_val = key[i]
-                u = i
-        
-        if u == -1: break # Không còn đỉnh nào nối được (đồ thị rời rạc)
-        
-        mst_set[u] = True
-        
-        # Cập nhật key cho các đỉnh kề v của u
-        if u in adj_list:
-            for v, w in adj_list[u]:
-                if not mst_set[v] and w < key[v]:
-                    key[v] = w
-                    parent[v] = u
-
-    # Tổng hợp kết quả
+    if start_node is None:
+        start_node = nodes[0]
+    elif is_csr and not (0 <= start_node < adj_list.num_nodes):
+        raise ValueError(f"Đỉnh bắt đầu {start_node} không tồn tại")
+    elif not is_csr and start_node not in adj_list:
+        raise ValueError(f"Đỉnh bắt đầu {start_node} không tồn tại")
+
+    in_mst = set()        # Đánh dấu đỉnh đã vào MST
     mst_edges = []
     total_weight = 0
-    for i in range(1, num_nodes):
-        if parent[i] != -1:
-            mst_edges.append((parent[i], i))
-            total_weight += key[i]
+    counter = 0           # Phá hòa trong heap, không phải so sánh key của đỉnh
+    
+    def push_neighbors(u, heap):
+        nonlocal counter
+        if is_csr:
+            targets, weights = adj_list.targets, adj_list.weights
+            for i in adj_list.out_range(u):
+                v = targets[i]
+                if v not in in_mst:
+                    counter += 1
+                    heapq.heappush(heap, (weights[i], counter, v, u))
+        else:
+            for v, w in adj_list.get(u, []):
+                if v not in in_mst:
+                    counter += 1
+                    heapq.heappush(heap, (w, counter, v, u))
+
+    # Bắt đầu từ start_node, sau đó lần lượt các thành phần chưa được phủ
+    roots = [start_node]
+    roots.extend(nodes)
+    for root in roots:
+        if root in in_mst:
+            continue
+        in_mst.add(root)
+        heap = []
+        push_neighbors(root, heap)
+        
+        while heap:
+            # Lấy cạnh nhẹ nhất nối ra ngoài cây (bỏ qua mục đã cũ)
+            w, _, v, u = heapq.heappop(heap)
+            if v in in_mst:
+                continue
+            in_mst.add(v)
+            mst_edges.append((u, v))
+            total_weight += w
+            push_neighbors(v, heap)
             
-    return mst_edges, total_weight
\ No newline at end of file
+    return mst_edges, total_weight
+
+# --- PHẦN 3: DUY TRÌ CÂY KHUNG KHI ĐỒ THỊ THAY ĐỔI ---
+class MSTSession:
+    """
+    Phiên cây khung (rừng khung) cực tiểu có trạng thái, dùng cho quy hoạch hạ tầng:
+    giữ cây hiện tại và sửa cục bộ khi đổi trọng số / thêm / xóa 1 cạnh.
+    - Cạnh ngoài cây rẻ đi hoặc cạnh mới: xét chu trình nó tạo trên cây,
+      thay cạnh nặng nhất trên chu trình nếu nặng hơn (cycle replacement).
+    - Cạnh trong cây đắt lên hoặc bị xóa: cắt cây làm 2 phần, chọn cạnh rẻ
+      nhất nối lại 2 phần, chỉ quét cạnh kề của phần nhỏ hơn (cut replacement).
+    Mỗi thao tác O(V + bậc phần nhỏ) thay vì chạy lại Kruskal O(E log E).
+    Các hàm sửa trả về (added, removed): chỉ số các cạnh vừa vào / ra khỏi cây.
+    """
+    def __init__(self, num_nodes=0, edges=()):
+        self.ends = []          # Cạnh k -> (u, v)
+        self.weight = []        # Trọng số cạnh k
+        self.alive = []         # False nếu cạnh đã bị xóa
+        self.in_tree = []       # True nếu cạnh k thuộc cây khung
+        self.incident = []      # Đỉnh u -> tập chỉ số cạnh kề (còn sống)
+        self.tree_adj = []      # Đỉnh u -> tập chỉ số cạnh cây kề
+        self.total_weight = 0
+
+        for _ in range(num_nodes):
+            self.add_node()
+        for u, v, w in edges:
+            self._append_edge(u, v, w)
+
+        # Dựng cây ban đầu bằng Kruskal trên chỉ số cạnh
+        solver = KruskalSolver(num_nodes)
+        for k in np.argsort(np.array(self.weight, dtype=np.float64), kind="stable").tolist():
+            u, v = self.ends[k]
+            if solver.union(u, v):
+                self._link(k)
+
+    # --- Truy vấn ---
+    def tree_edges(self):
+        """Danh sách cạnh cây dạng (u, v) để tô màu trên Canvas."""
+        return [self.ends[k] for k in range(len(self.ends)) if self.in_tree[k]]
+
+    # --- Thao tác sửa ---
+    def add_node(self):
+        self.incident.append(set())
+        self.tree_adj.append(set())
+        return len(self.incident) - 1
+
+    def insert_edge(self, u, v, w):
+        """Thêm cạnh mới. Trả về (k, added, removed)."""
+        k = self._append_edge(u, v, w)
+        added, removed = self._try_insert(k)
+        return k, added, removed
+
+    def delete_edge(self, k):
+        if not self.alive[k]:
+            return [], []
+        self.alive[k] = False
+        u, v = self.ends[k]
+        self.incident[u].discard(k)
+        self.incident[v].discard(k)
+        if self.in_tree[k]:
+            return self._replace_tree_edge(k)
+        return [], []
+
+    def update_weight(self, k, w):
+        old = self.weight[k]
+        self.weight[k] = w
+        if not self.alive[k] or w == old:
+            return [], []
+
+        if self.in_tree[k]:
+            self.total_weight += w - old
+            # Cạnh cây rẻ đi: cây vẫn tối ưu. Đắt lên: tìm cạnh thay thế qua lát cắt
+            return self._replace_tree_edge(k) if w > old else ([], [])
+
+        # Cạnh ngoài cây đắt lên: không đổi. Rẻ đi: thử đưa vào cây
+        return self._try_insert(k) if w < old else ([], [])
+
+    # --- Nội bộ ---
+    def _append_edge(self, u, v, w):
+        k = len(self.ends)
+        self.ends.append((u, v))
+        self.weight.append(w)
+        self.alive.append(True)
+        self.in_tree.append(False)
+        self.incident[u].add(k)
+        self.incident[v].add(k)
+        return k
+
+    def _link(self, k):
+        u, v = self.ends[k]
+        self.in_tree[k] = True
+        self.tree_adj[u].add(k)
+        self.tree_adj[v].add(k)
+        self.total_weight += self.weight[k]
+
+    def _cut(self, k):
+        u, v = self.ends[k]
+        self.in_tree[k] = False
+        self.tree_adj[u].discard(k)
+        self.tree_adj[v].discard(k)
+        self.total_weight -= self.weight[k]
+
+    def _tree_path(self, src, dst):
+        """Các cạnh trên đường đi duy nhất src -> dst trong rừng (None nếu khác cây)."""
+        parent_edge = {src: None}
+        stack = [src]
+        while stack:
+            x = stack.pop()
+            if x == dst:
+                break
+            for e in self.tree_adj[x]:
+                a, b = self.ends[e]
+                y = b if a == x else a
+                if y not in parent_edge:
+                    parent_edge[y] = e
+                    stack.append(y)
+        if dst not in parent_edge:
+            return None
+
+        path = []
+        x = dst
+        while parent_edge[x] is not None:
+            e = parent_edge[x]
+            path.append(e)
+            a, b = self.ends[e]
+            x = b if a == x else a
+        return path
+
+    def _try_insert(self, k):
+        # Cycle replacement cho cạnh k đang nằm ngoài cây
+        u, v = self.ends[k]
+        if u == v:
+            return [], []
+        path = self._tree_path(u, v)
+        if path is None:
+            # 2 đầu mút thuộc 2 cây khác nhau -> nối rừng lại
+            self._link(k)
+            return [k], []
+
+        heaviest = max(path, key=self.weight.__getitem__)
+        if self.weight[heaviest] > self.weight[k]:
+            self._cut(heaviest)
+            self._link(k)
+            return [k], [heaviest]
+        return [], []
+
+    def _side(self, root):
+        seen = {root}
+        stack = [root]
+        while stack:
+            x = stack.pop()
+            for e in self.tree_adj[x]:
+                a, b = self.ends[e]
+                y = b if a == x else a
+                if y not in seen:
+                    seen.add(y)
+                    stack.append(y)
+        return seen
+
+    def _replace_tree_edge(self, k):
+        # Cut replacement: bỏ cạnh k khỏi cây, nối lại bằng cạnh rẻ nhất qua lát cắt
+        u, v = self.ends[k]
+        self._cut(k)
+        side_u = self._side(u)
+        side_v = self._side(v)
+        small, other = (side_u, side_v) if len(side_u) <= len(side_v) else (side_v, side_u)
+
+        best = None
+        for x in small:
+            for e in self.incident[x]:
+                a, b = self.ends[e]
+                y = b if a == x else a
+                if y in other and (best is None or self.weight[e] < self.weight[best]):
+                    best = e
+
+        if best is None:
+            # Không còn cạnh nối 2 phần: cây tách đôi
+            return [], [k]
+        self._link(best)
+        if best == k:
+            return [], []
+        return [best], [k]
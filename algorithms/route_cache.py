@@ -0,0 +1,63 @@
+#Bộ nhớ đệm (LRU) cây đường đi ngắn nhất theo điểm xuất phát
+
+from collections import OrderedDict
+from typing import List, Tuple, Optional
+from algorithms.shortest_path import TrafficGraph
+from algorithms.dynamic_sssp import DynamicShortestPathTree
+
+class RouteCache:
+    """
+    Giữ tối đa `capacity` cây đường đi ngắn nhất của các điểm xuất phát hay dùng
+    (kho, bệnh viện...), khóa (source, mode); mỗi cây nhớ graph.version lúc tính.
+    - Hỏi đường từ 1 nguồn đã có cây: chỉ lần ngược con trỏ cha, không chạy lại Dijkstra.
+    - Quá sức chứa: bỏ cây lâu không dùng nhất (LRU).
+    - Đồ thị đổi (version tăng): chỉ đổi tắc đường thì cây được sửa cục bộ
+      (DynamicShortestPathTree), đổi cấu trúc thì cây được tính lại.
+    """
+    def __init__(self, graph: TrafficGraph, capacity: int = 16):
+        self.graph = graph
+        self.capacity = max(1, capacity)
+        self._trees = OrderedDict()     # (source, mode) -> DynamicShortestPathTree
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._trees)
+
+    def clear(self) -> None:
+        self._trees.clear()
+
+    def tree(self, source: str, mode: str = 'time'):
+        """Cây đường đi ngắn nhất từ source: (dist, parent) như shortest_path_tree."""
+        key = (source, mode)
+        entry = self._trees.get(key)
+        if entry is not None:
+            self._trees.move_to_end(key)
+            self.hits += 1
+            entry.refresh()
+        else:
+            self.misses += 1
+            entry = DynamicShortestPathTree(self.graph, source, mode)
+            self._trees[key] = entry
+            if len(self._trees) > self.capacity:
+                self._trees.popitem(last=False)
+        return entry.dist, entry.parent
+
+    def route(self, start: str, end: str, mode: str = 'time') -> Tuple[Optional[List[str]], float]:
+        """Đường đi start -> end, output giống a_star_search: (path, cost)."""
+        graph = self.graph
+        if start not in graph.index or end not in graph.index:
+            return None, float('inf')
+
+        dist, parent = self.tree(start, mode)
+        s, t = graph.index[start], graph.index[end]
+        if dist[t] == float('inf'):
+            return None, float('inf')
+
+        path = [t]
+        v = t
+        while v != s:
+            v = graph.arc_from[parent[v]]
+            path.append(v)
+        path.reverse()
+        return [graph.ids[i] for i in path], dist[t]
@@ -0,0 +1,98 @@
+#Ma trận thời gian / quãng đường di chuyển giữa nhiều điểm đi và điểm đến
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+import numpy as np
+from algorithms.shortest_path import TrafficGraph, shortest_path_tree
+
+# Đồ thị của tiến trình con (gửi 1 lần qua initializer, không gửi lại theo từng việc)
+_worker_graph: Optional[TrafficGraph] = None
+
+def _init_worker(graph: TrafficGraph) -> None:
+    global _worker_graph
+    _worker_graph = graph
+
+def _rows(graph: TrafficGraph, origins: List[int], targets: List[int], mode: str) -> np.ndarray:
+    # 1 lượt Dijkstra cho mỗi điểm đi, dừng khi đã chốt hết các điểm đến
+    target_set = set(targets)
+    rows = np.empty((len(origins), len(targets)), dtype=np.float64)
+    for r, s in enumerate(origins):
+        dist, _ = shortest_path_tree(graph, s, mode, targets=target_set)
+        rows[r] = np.frombuffer(dist, dtype=np.float64)[targets]
+    return rows
+
+def _worker_rows(origins: List[int], targets: List[int], mode: str) -> np.ndarray:
+    return _rows(_worker_graph, origins, targets, mode)
+
+def _hierarchy_matrix(ch, sources: List[int], targets: List[int]) -> np.ndarray:
+    # Nhiều-nhiều trên Contraction Hierarchies: mỗi điểm đến 1 lượt tìm ngược đi lên,
+    # ghi (cột, khoảng cách) vào "bucket" của từng đỉnh đã chốt; mỗi điểm đi 1 lượt
+    # tìm xuôi đi lên, gặp đỉnh nào thì quét bucket của đỉnh đó.
+    buckets = {}
+    for col, t in enumerate(targets):
+        for x, d in ch.upward_search(t, backward=True).items():
+            buckets.setdefault(x, []).append((col, d))
+
+    matrix = np.full((len(sources), len(targets)), np.inf)
+    for r, s in enumerate(sources):
+        row = matrix[r].tolist()
+        for x, d in ch.upward_search(s).items():
+            for col, d2 in buckets.get(x, ()):
+                if d + d2 < row[col]:
+                    row[col] = d + d2
+        matrix[r] = row
+    return matrix
+
+def travel_time_matrix(graph: TrafficGraph, origins: List[str],
+                       destinations: Optional[List[str]] = None,
+                       mode: str = 'time', processes: Optional[int] = None,
+                       hierarchy=None) -> np.ndarray:
+    """
+    Ma trận chi phí origins x destinations (theo mode 'time' / 'distance').
+    - destinations=None: dùng lại danh sách origins (ma trận vuông).
+    - Mỗi điểm đi chạy 1 Dijkstra có cắt tỉa (dừng khi mọi điểm đến đã chốt),
+      thay vì gọi a_star_search cho từng cặp.
+    - processes: số tiến trình chia các điểm đi (mặc định = số CPU; 1 = chạy tại chỗ).
+    - hierarchy: ContractionHierarchy đã dựng cho đúng đồ thị và mode (tùy chọn);
+      khi có thì dùng thuật toán bucket nhiều-nhiều, nhanh hơn nhiều lần.
+    Output: numpy array float64 kích thước (len(origins), len(destinations)),
+    inf nếu không có đường.
+    """
+    if destinations is None:
+        destinations = origins
+
+    missing = [x for x in list(origins) + list(destinations) if x not in graph.index]
+    if missing:
+        raise ValueError(f"Đỉnh không tồn tại: {missing[0]}")
+
+    sources = [graph.index[x] for x in origins]
+    targets = [graph.index[x] for x in destinations]
+    if not sources or not targets:
+        return np.full((len(sources), len(targets)), np.inf)
+
+    if hierarchy is not None:
+        if (hierarchy.graph is not graph or hierarchy.mode != mode
+                or hierarchy.version != graph.version):
+            raise ValueError("Contraction hierarchy không khớp đồ thị / mode")
+        return _hierarchy_matrix(hierarchy, sources, targets)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(1, min(processes, len(sources)))
+
+    # Dựng sẵn chỉ mục CSR để tiến trình con nhận luôn, không phải dựng lại
+    graph.out_index()
+
+    if processes == 1:
+        return _rows(graph, sources, targets, mode)
+
+    # Chia điểm đi thành nhiều khối nhỏ hơn số tiến trình để cân tải
+    chunk = max(1, len(sources) // (processes * 4))
+    blocks = [sources[i:i + chunk] for i in range(0, len(sources), chunk)]
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                             initargs=(graph,)) as pool:
+        parts = list(pool.map(_worker_rows, blocks,
+                              [targets] * len(blocks), [mode] * len(blocks)))
+    return np.vstack(parts)
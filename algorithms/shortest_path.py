@@ -1,46 +1,370 @@
 #Tìm đường đi ngắn nhất (dijkstra)
 
 import heapq
+from array import array
 from typing import Dict, List, Tuple, Optional
 from core.converters import euclidean_distance, calculate_eta_hours
 
+SLOTS_PER_DAY = 96                      # Hồ sơ tắc đường: 1 mốc mỗi 15 phút
+SLOT_HOURS = 24.0 / SLOTS_PER_DAY
+
 class TrafficGraph:
+    """
+    Đồ thị giao thông dạng gọn:
+    - ID đỉnh (chuỗi) được đổi sang số nguyên 0..n-1 (ids / index).
+    - Tọa độ, độ dài, thời gian lưu trong mảng phẳng (array) thay vì 1 dict cho mỗi cạnh.
+    - Mỗi tuyến đường (road) có 1 id; đường 2 chiều sinh 2 cung (arc) liền nhau.
+    - Trọng số theo mode ('time' / 'distance') là 1 mảng theo cung, thuật toán
+      chỉ cần weights[a] mà không phải rẽ nhánh theo mode cho từng cạnh.
+    - Chỉ mục CSR (cung đi ra / đi vào của từng đỉnh) được dựng lười khi cần.
+    - Hồ sơ tắc đường theo giờ (tùy chọn): mỗi hồ sơ là SLOTS_PER_DAY hệ số liền nhau
+      trong 1 mảng chung profile_values; hồ sơ trùng nhau chỉ lưu 1 lần, tuyến đường
+      chỉ giữ id hồ sơ (road_profile, -1 = dùng hệ số cố định).
+    """
     def __init__(self):
-        self.nodes: Dict[str, Tuple[float, float]] = {}
-        self.edges: Dict[str, List[Dict]] = {}
+        self.ids: List[str] = []            # Chỉ số -> ID đỉnh
+        self.index: Dict[str, int] = {}     # ID đỉnh -> chỉ số
+        self.xs = array('d')                # Tọa độ X theo chỉ số đỉnh
+        self.ys = array('d')                # Tọa độ Y theo chỉ số đỉnh
+
+        # Theo tuyến đường (road id)
+        self.road_arc = array('i')          # Cung đầu tiên của tuyến (cung ngược = +1 nếu 2 chiều)
+        self.road_base_time = array('d')    # Thời gian khi đường thông thoáng (giờ)
+        self.road_multiplier = array('d')   # Hệ số tắc đường
+        self.road_profile = array('i')      # Id hồ sơ tắc đường theo giờ (-1 = không có)
+
+        # Hồ sơ tắc đường dùng chung
+        self.profile_values = array('d')    # Hồ sơ p: profile_values[p*SLOTS_PER_DAY : (p+1)*SLOTS_PER_DAY]
+        self.profile_min = array('d')       # Hệ số nhỏ nhất của từng hồ sơ (cho cận dưới A*)
+        self._profile_ids = {}              # tuple hệ số -> id hồ sơ (khử trùng lặp)
+
+        # Theo cung (arc id)
+        self.arc_from = array('i')
+        self.arc_to = array('i')
+        self.arc_road = array('i')
+        self.arc_distance = array('d')      # Trọng số khoảng cách
+        self.arc_time = array('d')          # Trọng số thời gian (có tắc đường)
+
+        self.version = 0                    # Tăng mỗi khi đồ thị thay đổi
+        self._out = None                    # CSR cung đi ra: (offsets, arcs)
+        self._in = None                     # CSR cung đi vào: (offsets, arcs)
+        self._cost_ratio = {}               # mode -> hệ số heuristic Euclid (xem cost_per_unit)
+        self._min_time = None               # Thời gian nhỏ nhất trong ngày theo cung (xem weights)
+        self._int_weights = {}              # mode -> trọng số dạng số nguyên (xem integer_weights)
+
+        # Nhật ký đổi trọng số tại chỗ (update_multipliers): [(version, các cung đã đổi)]
+        self._weight_log = []
+        self._log_base = 0                  # Nhật ký đầy đủ cho mọi version >= _log_base
+
+    MAX_WEIGHT_LOG = 1000
+
+    def _touch(self):
+        # Đổi cấu trúc (thêm đỉnh / đường): chỉ mục và nhật ký trọng số không còn dùng được
+        self.version += 1
+        self._out = None
+        self._in = None
+        self._cost_ratio = {}
+        self._min_time = None
+        self._int_weights = {}
+        self._weight_log = []
+        self._log_base = self.version
 
     def add_node(self, node_id: str, x: float, y: float) -> None:
-        self.nodes[node_id] = (x, y)
-        if node_id not in self.edges:
-            self.edges[node_id] = []
-
-    def add_road(self, u: str, v: str, distance_km: float, 
-                 speed_limit_kmh: float = 40, 
-                 traffic_multiplier: float = 1.0, 
-                 one_way: bool = False) -> None:
-        
-        if u not in self.nodes or v not in self.nodes:
-            return 
+        i = self.index.get(node_id)
+        if i is None:
+            self.index[node_id] = len(self.ids)
+            self.ids.append(node_id)
+            self.xs.append(x)
+            self.ys.append(y)
+        else:
+            self.xs[i] = x
+            self.ys[i] = y
+        self._touch()
+
+    def add_road(self, u: str, v: str, distance_km: float,
+                 speed_limit_kmh: float = 40,
+                 traffic_multiplier: float = 1.0,
+                 one_way: bool = False) -> Optional[int]:
+        """Thêm tuyến đường, trả về road id (None nếu đỉnh không tồn tại)."""
+        if u not in self.index or v not in self.index:
+            return None
 
         # Tính thời gian đi hết cạnh này
         base_time = calculate_eta_hours(distance_km, speed_limit_kmh)
         real_time = base_time * traffic_multiplier
 
-        edge_data = {
-            'to': v,
-            'distance': distance_km,       # Trọng số khoảng cách
-            'weight_time': real_time       # Trọng số thời gian (có tắc đường)
-        }
-
-        self.edges[u].append(edge_data)
+        road = len(self.road_arc)
+        self.road_arc.append(len(self.arc_to))
+        self.road_base_time.append(base_time)
+        self.road_multiplier.append(traffic_multiplier)
+        self.road_profile.append(-1)
 
+        iu, iv = self.index[u], self.index[v]
+        self._append_arc(iu, iv, road, distance_km, real_time)
         if not one_way:
-            reverse_edge_data = edge_data.copy()
-            reverse_edge_data['to'] = u
-            self.edges[v].append(reverse_edge_data)
+            self._append_arc(iv, iu, road, distance_km, real_time)
+
+        self._touch()
+        return road
+
+    def _append_arc(self, iu, iv, road, distance_km, real_time):
+        self.arc_from.append(iu)
+        self.arc_to.append(iv)
+        self.arc_road.append(road)
+        self.arc_distance.append(distance_km)
+        self.arc_time.append(real_time)
+
+    def move_node(self, node_id: str, x: float, y: float) -> None:
+        """
+        Đổi tọa độ nút có sẵn. Không đổi cấu trúc / trọng số nên giữ nguyên version
+        (cây đường đi, CH, landmarks vẫn dùng được); chỉ bỏ hệ số cận dưới theo tọa độ.
+        """
+        i = self.index[node_id]
+        self.xs[i] = x
+        self.ys[i] = y
+        self._cost_ratio = {}
 
     def get_coords(self, node_id: str) -> Tuple[float, float]:
-        return self.nodes.get(node_id)
+        i = self.index.get(node_id)
+        if i is None:
+            return None
+        return (self.xs[i], self.ys[i])
+
+    def num_nodes(self) -> int:
+        return len(self.ids)
+
+    def num_arcs(self) -> int:
+        return len(self.arc_to)
+
+    def __contains__(self, node_id) -> bool:
+        return node_id in self.index
+
+    def weights(self, mode: str = 'time') -> array:
+        """
+        Mảng trọng số theo cung cho mode ('time' hoặc 'distance').
+        mode='min_time': thời gian nhỏ nhất có thể trong ngày (theo hồ sơ tắc đường),
+        dùng làm cận dưới cho tìm đường phụ thuộc thời gian.
+        """
+        if mode == 'min_time':
+            if self._min_time is None:
+                self._min_time = array('d', self.arc_time)
+                for a in range(len(self.arc_to)):
+                    road = self.arc_road[a]
+                    pid = self.road_profile[road]
+                    if pid >= 0:
+                        self._min_time[a] = self.road_base_time[road] * self.profile_min[pid]
+            return self._min_time
+        return self.arc_time if mode == 'time' else self.arc_distance
+
+    def cost_per_unit(self, mode: str = 'time') -> float:
+        """
+        Chi phí nhỏ nhất trên 1 đơn vị khoảng cách chim bay, lấy min trên mọi cung:
+        weight(a) / euclid(a). Nhân khoảng cách chim bay với hệ số này luôn
+        không vượt chi phí thật (heuristic chấp nhận được) mà vẫn sát nhất có thể.
+        """
+        ratio = self._cost_ratio.get(mode)
+        if ratio is None:
+            weights, xs, ys = self.weights(mode), self.xs, self.ys
+            ratio = float('inf')
+            for a in range(len(self.arc_to)):
+                u, v = self.arc_from[a], self.arc_to[a]
+                d = euclidean_distance(xs[u], ys[u], xs[v], ys[v])
+                if d > 0:
+                    ratio = min(ratio, weights[a] / d)
+            if ratio == float('inf'):
+                ratio = 0.0 # Không có cung nào đo được -> heuristic = 0 (Dijkstra)
+            self._cost_ratio[mode] = ratio
+        return ratio
+
+    def road_arcs(self, road: int) -> List[int]:
+        """Các cung của tuyến đường (1 cung nếu 1 chiều, 2 cung liền nhau nếu 2 chiều)."""
+        a = self.road_arc[road]
+        if a + 1 < len(self.arc_road) and self.arc_road[a + 1] == road:
+            return [a, a + 1]
+        return [a]
+
+    def update_multipliers(self, edge_ids, values) -> List[int]:
+        """
+        Cập nhật hàng loạt hệ số tắc đường cho các tuyến (road id) và sửa thời gian
+        đi của các cung tương ứng ngay tại chỗ, không tạo lại đường.
+        Tăng version 1 lần cho cả lô và ghi nhật ký cung đã đổi (changed_arcs_since)
+        để cây đường đi đã tính có thể được sửa cục bộ thay vì tính lại.
+        Trả về danh sách cung có thời gian thay đổi.
+        """
+        edge_ids = list(edge_ids)
+        values = list(values)
+        if len(edge_ids) != len(values):
+            raise ValueError("edge_ids và values phải cùng độ dài")
+
+        # Kiểm tra cả lô trước khi sửa, để lỗi giữa chừng không để lại thay đổi không ghi nhật ký
+        for road, m in zip(edge_ids, values):
+            if m <= 0:
+                raise ValueError(f"Hệ số tắc đường phải dương (tuyến {road})")
+
+        changed = []
+        for road, m in zip(edge_ids, values):
+            self.road_multiplier[road] = m
+            real_time = self.road_base_time[road] * m
+            for a in self.road_arcs(road):
+                if self.arc_time[a] != real_time:
+                    self.arc_time[a] = real_time
+                    changed.append(a)
+
+        if changed:
+            for mode in ('time', 'min_time'):
+                self._cost_ratio.pop(mode, None)
+                self._int_weights.pop(mode, None)
+            self._min_time = None
+            self._log_weights(changed)
+        return changed
+
+    def _log_weights(self, changed) -> None:
+        # Đổi trọng số (không đổi cấu trúc): tăng version và ghi lại các cung đã đổi
+        self.version += 1
+        self._weight_log.append((self.version, changed))
+        if len(self._weight_log) > self.MAX_WEIGHT_LOG:
+            # Bỏ bớt nhật ký cũ; ai cần xa hơn thì phải tính lại từ đầu
+            self._log_base = self._weight_log[0][0]
+            del self._weight_log[0]
+
+    def changed_arcs_since(self, version: int):
+        """
+        Tập cung có trọng số thời gian ('time' / 'min_time') đổi kể từ version (chỉ đổi trọng số, không đổi
+        cấu trúc). None nếu đồ thị đã đổi cấu trúc hoặc nhật ký không còn đủ xa.
+        """
+        if version < self._log_base or version > self.version:
+            return None
+        changed = set()
+        for ver, arcs in reversed(self._weight_log):
+            if ver <= version:
+                break
+            changed.update(arcs)
+        return changed
+
+    def add_profile(self, multipliers) -> int:
+        """
+        Thêm hồ sơ tắc đường (SLOTS_PER_DAY hệ số, mốc i ứng với giờ i * SLOT_HOURS,
+        nội suy tuyến tính giữa các mốc, mốc cuối nối vòng về mốc đầu).
+        Trả về id hồ sơ; hồ sơ đã có thì dùng lại.
+        """
+        key = tuple(float(m) for m in multipliers)
+        if len(key) != SLOTS_PER_DAY:
+            raise ValueError(f"Hồ sơ tắc đường cần đúng {SLOTS_PER_DAY} giá trị")
+        if min(key) <= 0:
+            raise ValueError("Hệ số tắc đường phải dương")
+
+        pid = self._profile_ids.get(key)
+        if pid is None:
+            pid = len(self.profile_min)
+            self._profile_ids[key] = pid
+            self.profile_values.extend(key)
+            self.profile_min.append(min(key))
+        return pid
+
+    def set_road_profile(self, road: int, multipliers) -> int:
+        """
+        Gắn hồ sơ tắc đường theo giờ cho tuyến road (None = bỏ, quay về hệ số cố định).
+        Kiểm tra tính FIFO: đi muộn hơn không bao giờ tới sớm hơn, tức thời gian đi
+        giảm không nhanh hơn thời gian trôi (độ dốc >= -1 trên mọi đoạn).
+        """
+        if multipliers is None:
+            self.road_profile[road] = -1
+            self._profile_changed(road)
+            return -1
+
+        base = self.road_base_time[road]
+        values = list(multipliers)
+        for i in range(len(values)):
+            drop = values[i] - values[(i + 1) % len(values)]
+            if base * drop > SLOT_HOURS:
+                raise ValueError(f"Hồ sơ vi phạm FIFO tại mốc {i} của tuyến {road}")
+
+        pid = self.add_profile(values)
+        self.road_profile[road] = pid
+        self._profile_changed(road)
+        return pid
+
+    def _profile_changed(self, road: int):
+        # Chỉ đổi thời gian phụ thuộc giờ: giữ chỉ mục CSR, bỏ các cận dưới đã tính
+        # và ghi nhật ký các cung của tuyến (trọng số 'min_time' của chúng đã đổi)
+        self._min_time = None
+        self._cost_ratio.pop('min_time', None)
+        self._int_weights.pop('min_time', None)
+        self._log_weights(list(self.road_arcs(road)))
+
+    def travel_time(self, a: int, depart: float) -> float:
+        """Thời gian đi cung a khi xuất phát lúc depart (giờ, tính từ 0h, có thể > 24)."""
+        road = self.arc_road[a]
+        pid = self.road_profile[road]
+        if pid < 0:
+            return self.arc_time[a]
+
+        x = (depart % 24.0) / SLOT_HOURS
+        i = int(x)
+        frac = x - i
+        base = pid * SLOTS_PER_DAY
+        m0 = self.profile_values[base + i % SLOTS_PER_DAY]
+        m1 = self.profile_values[base + (i + 1) % SLOTS_PER_DAY]
+        return self.road_base_time[road] * (m0 + (m1 - m0) * frac)
+
+    MAX_BUCKET_WEIGHT = 1 << 16
+
+    def integer_weights(self, mode: str = 'time') -> Optional[List[int]]:
+        """
+        Trọng số theo mode dạng list số nguyên nếu tất cả là số nguyên trong
+        [0, MAX_BUCKET_WEIGHT] (vd. trọng số nhập trên canvas 1..999), ngược lại None.
+        Khi có, Dijkstra dùng hàng đợi bucket (Dial) thay cho heapq.
+        (Dùng list thay vì array vì vòng lặp nóng đọc nhanh hơn; chỉ tạo 1 lần cho mỗi mode.)
+        """
+        if mode not in self._int_weights:
+            result = None
+            weights = self.weights(mode)
+            # is_integer() loại luôn inf/nan (vd. đường tốc độ 0) -> về engine heap
+            if all(float(w).is_integer() and 0 <= w <= self.MAX_BUCKET_WEIGHT for w in weights):
+                result = [int(w) for w in weights]
+            self._int_weights[mode] = result
+        return self._int_weights[mode]
+
+    @classmethod
+    def from_canvas_data(cls, nodes, edges, directed: bool = True) -> 'TrafficGraph':
+        """
+        Dựng từ dữ liệu MapCanvas: đỉnh i có ID str(i), trọng số cạnh dùng làm
+        độ dài (mode 'distance' cho đúng chi phí như trên bản đồ).
+        """
+        graph = cls()
+        for i, (x, y) in enumerate(nodes):
+            graph.add_node(str(i), x, y)
+        for item in edges:
+            u, v, w = item[0], item[1], item[2]
+            graph.add_road(str(u), str(v), float(w), one_way=directed)
+        return graph
+
+    @staticmethod
+    def _build_index(n, keys):
+        # Counting sort các cung theo đỉnh -> (offsets, arcs), giữ thứ tự thêm vào
+        offsets = array('q', bytes(8 * (n + 1)))
+        for u in keys:
+            offsets[u + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        arcs = array('i', bytes(4 * len(keys)))
+        fill = array('q', offsets)
+        for a, u in enumerate(keys):
+            arcs[fill[u]] = a
+            fill[u] += 1
+        return offsets, arcs
+
+    def out_index(self):
+        """CSR cung đi ra: cung của u là arcs[offsets[u] : offsets[u+1]]."""
+        if self._out is None:
+            self._out = self._build_index(len(self.ids), self.arc_from)
+        return self._out
+
+    def in_index(self):
+        """CSR cung đi vào: cung vào v là arcs[offsets[v] : offsets[v+1]]."""
+        if self._in is None:
+            self._in = self._build_index(len(self.ids), self.arc_to)
+        return self._in
 
 def reconstruct_path(came_from: Dict, current: str) -> List[str]:
     total_path = [current]
@@ -49,62 +373,265 @@ def reconstruct_path(came_from: Dict, current: str) -> List[str]:
         total_path.append(current)
     return total_path[::-1]
 
-def a_star_search(graph: TrafficGraph, start: str, end: str, mode: str = 'time') -> Tuple[Optional[List[str]], float]:
+def a_star_search(graph: TrafficGraph, start: str, end: str, mode: str = 'time',
+                  lower_bound=None) -> Tuple[Optional[List[str]], float]:
     """
     mode='time': Tìm đường nhanh nhất (xét tắc đường)
     mode='distance': Tìm đường ngắn nhất (về độ dài)
+    lower_bound(u, v): cận dưới chi phí u -> v trên chỉ số đỉnh (vd. Landmarks.lower_bound),
+    mặc định là khoảng cách chim bay (euclidean_lower_bound).
     """
-    if start not in graph.nodes or end not in graph.nodes:
+    if start not in graph.index or end not in graph.index:
         return None, float('inf')
 
+    s, t = graph.index[start], graph.index[end]
+
+    # 1. Chọn mảng trọng số 1 lần cho cả lượt tìm (không rẽ nhánh theo cạnh)
+    weights = graph.weights(mode)
+    offsets, arcs = graph.out_index()
+    arc_to = graph.arc_to
+
+    # Heuristic: cận dưới chi phí còn lại về đích
+    if lower_bound is None:
+        lower_bound = euclidean_lower_bound(graph, mode)
+
     open_set = []
-    # (f_score, current_node)
-    heapq.heappush(open_set, (0.0, start))
-    
+    # (f_score, g_score, current_node)
+    heapq.heappush(open_set, (0.0, 0.0, s))
+
     came_from = {}
-    
-    # g_score: Chi phí thực tế từ Start -> Node hiện tại
-    g_score = {node: float('inf') for node in graph.nodes}
-    g_score[start] = 0.0
-    
-    # Lấy tọa độ đích để tính Heuristic
-    end_x, end_y = graph.get_coords(end)
+
+    # g_score: Chi phí thực tế từ Start -> Node hiện tại (chỉ lưu đỉnh đã chạm tới)
+    g_score = {s: 0.0}
 
     while open_set:
-        current_f, current = heapq.heappop(open_set)
-
-        if current == end:
-            return reconstruct_path(came_from, current), g_score[end]
-
-        if current in graph.edges:
-            for edge in graph.edges[current]:
-                neighbor = edge['to']
-                
-                # 1. Chọn loại trọng số dựa trên mode
-                if mode == 'time':
-                    cost_to_neighbor = edge['weight_time']
-                else: # mode == 'distance'
-                    cost_to_neighbor = edge['distance']
-                
-                tentative_g_score = g_score[current] + cost_to_neighbor
-
-                if tentative_g_score < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g_score
-                    
-                    # 2. Tính Heuristic (Khoảng cách chim bay về đích)
-                    neigh_x, neigh_y = graph.get_coords(neighbor)
-                    
-                    # Dùng Euclid vì là màn hình phẳng
-                    dist_to_end = euclidean_distance(neigh_x, neigh_y, end_x, end_y)
-                    
-                    if mode == 'time':
-                        # Chia cho tốc độ lý tưởng (ví dụ 100) để ra thời gian ước lượng
-                        h_score = dist_to_end / 100.0
-                    else:
-                        h_score = dist_to_end
-                    
-                    f_score = tentative_g_score + h_score
-                    heapq.heappush(open_set, (f_score, neighbor))
-
-    return None, float('inf')
\ No newline at end of file
+        current_f, current_g, current = heapq.heappop(open_set)
+
+        if current == t:
+            path = reconstruct_path(came_from, current)
+            return [graph.ids[i] for i in path], g_score[t]
+
+        if current_g > g_score[current]:
+            continue # Mục cũ trong heap
+
+        for i in range(offsets[current], offsets[current + 1]):
+            a = arcs[i]
+            neighbor = arc_to[a]
+            tentative_g_score = current_g + weights[a]
+
+            if tentative_g_score < g_score.get(neighbor, float('inf')):
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+
+                # 2. Tính Heuristic (cận dưới chi phí từ neighbor về đích)
+                h_score = lower_bound(neighbor, t)
+
+                f_score = tentative_g_score + h_score
+                heapq.heappush(open_set, (f_score, tentative_g_score, neighbor))
+
+    return None, float('inf')
+
+def euclidean_lower_bound(graph: TrafficGraph, mode: str = 'time'):
+    """
+    Heuristic Euclid của A* dưới dạng hàm lb(u, v) trên chỉ số đỉnh:
+    khoảng cách chim bay nhân hệ số graph.cost_per_unit(mode), nên không bao giờ
+    vượt chi phí thật (thay cho việc chia cứng cho tốc độ 100).
+    """
+    xs, ys = graph.xs, graph.ys
+    h_scale = graph.cost_per_unit(mode)
+
+    def lower_bound(u: int, v: int) -> float:
+        return euclidean_distance(xs[u], ys[u], xs[v], ys[v]) * h_scale
+
+    return lower_bound
+
+def bidirectional_search(graph: TrafficGraph, start: str, end: str, mode: str = 'time',
+                         use_heuristic: bool = True,
+                         lower_bound=None) -> Tuple[Optional[List[str]], float]:
+    """
+    Tìm đường 2 chiều: 1 lượt tìm xuôi từ start trên cung đi ra, 1 lượt tìm
+    ngược từ end trên cung đi vào (nên đường 1 chiều vẫn đúng hướng).
+    - use_heuristic=True: A* 2 chiều với thế trung bình p(v) = (h_t(v) - h_s(v)) / 2
+      để 2 phía nhất quán với nhau; False: Dijkstra 2 chiều.
+    - lower_bound(u, v): cận dưới dùng làm h (mặc định khoảng cách chim bay).
+    - Dừng khi tổng khóa nhỏ nhất 2 hàng đợi >= chi phí đường tốt nhất đã gặp.
+    Output giống a_star_search: (path, cost).
+    """
+    if start not in graph.index or end not in graph.index:
+        return None, float('inf')
+
+    s, t = graph.index[start], graph.index[end]
+    if s == t:
+        return [start], 0.0
+
+    weights = graph.weights(mode)
+    out_offsets, out_arcs = graph.out_index()
+    in_offsets, in_arcs = graph.in_index()
+    arc_from, arc_to = graph.arc_from, graph.arc_to
+
+    if use_heuristic:
+        lb = lower_bound or euclidean_lower_bound(graph, mode)
+        potential = lambda v: (lb(v, t) - lb(s, v)) * 0.5
+    else:
+        potential = lambda v: 0.0
+
+    INF = float('inf')
+    dist = ({s: 0.0}, {t: 0.0})         # Khoảng cách xuôi / ngược
+    parent = ({}, {})                   # Cung cha của từng đỉnh ở mỗi phía
+    pot = {s: potential(s), t: potential(t)}
+    heaps = ([(pot[s], 0.0, s)], [(-pot[t], 0.0, t)])
+
+    best, meet = INF, None              # Chi phí đường tốt nhất đã gặp và đỉnh gặp nhau
+
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break # Không đường nào chưa xét có thể tốt hơn
+
+        # Mở rộng phía có khóa nhỏ hơn
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        _, d_u, u = heapq.heappop(heaps[side])
+        my_dist, other_dist = dist[side], dist[1 - side]
+        if d_u > my_dist[u]:
+            continue # Mục cũ trong heap
+
+        if side == 0:
+            offsets, arcs, ends, sign = out_offsets, out_arcs, arc_to, 1.0
+        else:
+            offsets, arcs, ends, sign = in_offsets, in_arcs, arc_from, -1.0
+
+        for i in range(offsets[u], offsets[u + 1]):
+            a = arcs[i]
+            v = ends[a]
+            d_v = d_u + weights[a]
+            if d_v < my_dist.get(v, INF):
+                my_dist[v] = d_v
+                parent[side][v] = a
+                if v not in pot:
+                    pot[v] = potential(v)
+                heapq.heappush(heaps[side], (d_v + sign * pot[v], d_v, v))
+
+                if v in other_dist and d_v + other_dist[v] < best:
+                    best, meet = d_v + other_dist[v], v
+
+    if meet is None:
+        return None, INF
+
+    # Ghép đường: start -> meet (theo cha xuôi) + meet -> end (theo cha ngược)
+    path = [meet]
+    v = meet
+    while v != s:
+        v = arc_from[parent[0][v]]
+        path.append(v)
+    path.reverse()
+    v = meet
+    while v != t:
+        v = arc_to[parent[1][v]]
+        path.append(v)
+
+    return [graph.ids[i] for i in path], best
+
+def shortest_path_tree(graph: TrafficGraph, sources, mode: str = 'time', reverse: bool = False,
+                       targets=None, budget: Optional[float] = None, engine: str = 'auto'):
+    """
+    Dijkstra 1 nguồn tới mọi đỉnh (hoặc nhiều nguồn cùng lúc).
+    - sources: 1 chỉ số đỉnh hoặc danh sách chỉ số.
+    - reverse=True: đi ngược cung, dist[v] = chi phí từ v tới nguồn.
+    - targets: tập chỉ số đỉnh cần; dừng ngay khi tất cả đã được chốt (settled),
+      các đỉnh khác khi đó có thể chỉ mang giá trị tạm.
+    - budget: dừng khi chi phí vượt ngân sách; đỉnh có dist <= budget là chính xác.
+    - engine: 'heap' (heapq), 'dial' (hàng đợi bucket, chỉ cho trọng số nguyên nhỏ)
+      hoặc 'auto' (dùng 'dial' khi graph.integer_weights(mode) có, còn lại 'heap').
+    Trả về (dist, parent): dist là array 'd' (inf nếu không tới được),
+    parent[v] là cung cuối trên đường tối ưu (-1 với nguồn / đỉnh không tới được).
+    """
+    if isinstance(sources, int):
+        sources = [sources]
+
+    n = graph.num_nodes()
+    if reverse:
+        offsets, arcs = graph.in_index()
+        ends = graph.arc_from
+    else:
+        offsets, arcs = graph.out_index()
+        ends = graph.arc_to
+
+    # Dùng list khi chạy (đọc list không phải tạo đối tượng số mới như array),
+    # đóng gói lại thành array khi trả về
+    INF = float('inf')
+    dist = [INF] * n
+    parent = [-1] * n
+    remaining = set(targets) if targets is not None else None
+
+    int_weights = graph.integer_weights(mode) if engine in ('auto', 'dial') else None
+    if engine == 'dial' and int_weights is None:
+        raise ValueError("Engine 'dial' cần trọng số nguyên không âm")
+    if int_weights is not None:
+        _dial(int_weights, offsets, arcs, ends, sources, dist, parent, remaining, budget)
+        return array('d', dist), array('i', parent)
+
+    weights = graph.weights(mode)
+    heap = []
+    for src in sources:
+        dist[src] = 0.0
+        heap.append((0.0, src))
+    heapq.heapify(heap)
+
+    while heap:
+        d_u, u = heapq.heappop(heap)
+        if d_u > dist[u]:
+            continue # Mục cũ trong heap
+        if budget is not None and d_u > budget:
+            break # Mọi đỉnh còn lại đều vượt ngân sách
+        if remaining is not None and u in remaining:
+            remaining.discard(u)
+            if not remaining:
+                break # Đã chốt hết đích cần tìm
+        for i in range(offsets[u], offsets[u + 1]):
+            a = arcs[i]
+            v = ends[a]
+            d_v = d_u + weights[a]
+            if d_v < dist[v]:
+                dist[v] = d_v
+                parent[v] = a
+                heapq.heappush(heap, (d_v, v))
+
+    return array('d', dist), array('i', parent)
+
+def _dial(weights, offsets, arcs, ends, sources, dist, parent, remaining, budget):
+    # Dijkstra với hàng đợi bucket vòng (Dial): trọng số nguyên <= C nên mọi khoảng
+    # cách tạm đang chờ nằm trong [d, d + C] -> C + 1 bucket là đủ, lấy ra O(1),
+    # không có log n và không tạo tuple cho mỗi lần đẩy.
+    nb = max(weights, default=0) + 1
+    buckets = [[] for _ in range(nb)]
+    for src in sources:
+        dist[src] = 0
+        buckets[0].append(src)
+
+    d = 0
+    empty_run = 0   # Số bucket rỗng liên tiếp; đủ 1 vòng nghĩa là hết đỉnh chờ
+    while empty_run < nb:
+        if budget is not None and d > budget:
+            return
+        bucket = buckets[d % nb]
+        if not bucket:
+            empty_run += 1
+            d += 1
+            continue
+        empty_run = 0
+        while bucket: # Bucket có thể nhận thêm đỉnh ngay trong lúc duyệt (cung trọng số 0)
+            u = bucket.pop()
+            if dist[u] != d:
+                continue # Mục cũ
+            if remaining is not None and u in remaining:
+                remaining.discard(u)
+                if not remaining:
+                    return
+            for i in range(offsets[u], offsets[u + 1]):
+                a = arcs[i]
+                v = ends[a]
+                d_v = d + weights[a]
+                if d_v < dist[v]:
+                    dist[v] = d_v
+                    parent[v] = a
+                    buckets[d_v % nb].append(v)
+        d += 1
@@ -0,0 +1,69 @@
+#BFS theo từng tầng trên mảng CSR bằng numpy: số bước (hop) từ nhiều nguồn tới mọi đỉnh
+
+from typing import Iterable, Optional, Tuple, Union
+import numpy as np
+from core.graph import CSRGraph
+
+def sparse_bfs(graph: CSRGraph, sources: Union[int, Iterable[int]], max_hops: Optional[int] = None,
+               direction: str = "out") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    BFS đồng bộ theo tầng: mỗi vòng mở rộng cả biên (frontier) bằng các phép numpy
+    trên offsets/targets, không lặp Python theo từng đỉnh, nên số vòng lặp Python
+    chỉ bằng số tầng.
+    - sources: 1 đỉnh (int) hoặc nhiều đỉnh nguồn (chỉ số 0..n-1 của CSRGraph), cùng ở tầng 0.
+    - max_hops: dừng sau số bước này (None = không giới hạn).
+    - direction: 'out' đi theo cung ra, 'in' đi ngược theo cung vào (vd. số bước
+      từ mọi đỉnh tới kho). Đồ thị vô hướng thì 2 chiều như nhau.
+    Output: (dist, parent) - mảng int64 dài n; dist = số bước tới nguồn gần nhất,
+    -1 nếu không tới được; parent = đỉnh liền trước trên cây BFS, -1 ở nguồn / đỉnh
+    không tới được. Đỉnh có nhiều cha cùng tầng thì lấy cha có chỉ số nhỏ nhất.
+    """
+    if direction == "out":
+        offsets, targets = graph.offsets, graph.targets
+    elif direction == "in":
+        offsets, targets = graph.rev_offsets, graph.rev_sources
+    else:
+        raise ValueError("direction phải là 'out' hoặc 'in'")
+
+    n = graph.num_nodes
+    offsets = np.frombuffer(offsets, dtype=np.int64)
+    targets = np.frombuffer(targets, dtype=np.int32)
+
+    dist = np.full(n, -1, dtype=np.int64)
+    parent = np.full(n, -1, dtype=np.int64)
+
+    if isinstance(sources, (int, np.integer)):
+        sources = [sources]
+    frontier = np.unique(np.asarray(list(sources), dtype=np.int64))
+    if frontier.size and (frontier[0] < 0 or frontier[-1] >= n):
+        raise ValueError("Đỉnh nguồn nằm ngoài đồ thị")
+    dist[frontier] = 0
+
+    level = 0
+    while frontier.size and (max_hops is None or level < max_hops):
+        # 1. Gom toàn bộ cung ra của biên: chỉ số cung = đầu đoạn kề + thứ tự trong đoạn
+        starts = offsets[frontier]
+        counts = offsets[frontier + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            break
+        ends = np.cumsum(counts)
+        arc = np.arange(total, dtype=np.int64) + np.repeat(starts - (ends - counts), counts)
+        nbrs = targets[arc].astype(np.int64)
+        fathers = np.repeat(frontier, counts)
+
+        # 2. Bỏ đỉnh đã có tầng
+        fresh = dist[nbrs] < 0
+        nbrs = nbrs[fresh]
+        if nbrs.size == 0:
+            break
+        fathers = fathers[fresh]
+
+        # 3. Giữ lần xuất hiện đầu tiên của mỗi đỉnh (np.unique trả về chỉ số đầu tiên)
+        frontier, first = np.unique(nbrs, return_index=True)
+
+        level += 1
+        dist[frontier] = level
+        parent[frontier] = fathers[first]
+
+    return dist, parent
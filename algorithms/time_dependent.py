@@ -0,0 +1,73 @@
+#Tìm đường phụ thuộc thời gian (giờ xuất phát) theo hồ sơ tắc đường của từng tuyến
+
+import heapq
+from typing import List, Tuple, Optional
+from algorithms.shortest_path import TrafficGraph, SLOTS_PER_DAY
+from core.converters import euclidean_distance
+
+def td_a_star_search(graph: TrafficGraph, start: str, end: str, departure: float,
+                     use_heuristic: bool = True) -> Tuple[Optional[List[str]], float]:
+    """
+    Dijkstra / A* phụ thuộc thời gian: thời gian đi mỗi cung tính theo lúc tới
+    đầu cung (graph.travel_time), tuyến không có hồ sơ thì dùng thời gian cố định.
+    - departure: giờ xuất phát (tính từ 0h, vd. 7.5 = 7h30).
+    - use_heuristic=False: Dijkstra; True: A* với cận dưới là khoảng cách chim bay
+      nhân hệ số nhỏ nhất của thời gian đi trong ngày (graph.cost_per_unit('min_time')).
+    Hồ sơ đều thỏa FIFO (kiểm tra khi gắn) nên tới sớm hơn luôn tốt hơn, thuật toán
+    gán nhãn cố định vẫn cho kết quả tối ưu.
+    Output: (path, thời gian đi tính bằng giờ) - giờ tới nơi = departure + cost.
+    """
+    if start not in graph.index or end not in graph.index:
+        return None, float('inf')
+
+    s, t = graph.index[start], graph.index[end]
+    offsets, arcs = graph.out_index()
+    arc_to, xs, ys = graph.arc_to, graph.xs, graph.ys
+    travel_time = graph.travel_time
+
+    h_scale = graph.cost_per_unit('min_time') if use_heuristic else 0.0
+    end_x, end_y = xs[t], ys[t]
+
+    arrival = {s: departure}    # Giờ tới sớm nhất tại mỗi đỉnh đã chạm tới
+    came_from = {}
+    open_set = [(departure, departure, s)]
+
+    while open_set:
+        _, arr_u, u = heapq.heappop(open_set)
+        if u == t:
+            path = [t]
+            while path[-1] in came_from:
+                path.append(came_from[path[-1]])
+            path.reverse()
+            return [graph.ids[i] for i in path], arr_u - departure
+
+        if arr_u > arrival[u]:
+            continue # Mục cũ trong heap
+
+        for i in range(offsets[u], offsets[u + 1]):
+            a = arcs[i]
+            v = arc_to[a]
+            arr_v = arr_u + travel_time(a, arr_u)
+            if arr_v < arrival.get(v, float('inf')):
+                arrival[v] = arr_v
+                came_from[v] = u
+                h = euclidean_distance(xs[v], ys[v], end_x, end_y) * h_scale if h_scale else 0.0
+                heapq.heappush(open_set, (arr_v + h, arr_v, v))
+
+    return None, float('inf')
+
+def rush_hour_profile(peaks, peak_multiplier: float = 2.0, width_hours: float = 1.5) -> List[float]:
+    """
+    Hồ sơ tắc đường mẫu: hệ số 1.0 bình thường, tăng tuyến tính lên peak_multiplier
+    tại mỗi giờ cao điểm trong peaks (vd. [7.5, 17.5]), rộng width_hours mỗi phía.
+    """
+    profile = []
+    for i in range(SLOTS_PER_DAY):
+        hour = i * 24.0 / SLOTS_PER_DAY
+        m = 1.0
+        for peak in peaks:
+            gap = min(abs(hour - peak), 24.0 - abs(hour - peak))
+            if gap < width_hours:
+                m = max(m, 1.0 + (peak_multiplier - 1.0) * (1.0 - gap / width_hours))
+        profile.append(m)
+    return profile
@@ -1,54 +1,113 @@
 #Duyệt đồ thị theo các chiến lược: BFS & DFS
 
 from collections import deque
+from typing import Iterator, Tuple
+from core.graph import CSRGraph
 
-# --- 1. BFS ---
-def run_bfs(adj_list, start_node):
-    if start_node not in adj_list:
-        return []
+DISCOVER = "discover"   # Lần đầu chạm tới đỉnh
+FINISH = "finish"       # Đã xét xong mọi đỉnh kề của đỉnh
 
-    visited = set()
-    queue = deque([start_node])
-    visited.add(start_node)
-    
-    visited_order = [] 
+# --- 0. DANH SÁCH KỀ ĐÃ SẮP XẾP (dùng chung giữa các lượt duyệt) ---
+class SortedAdjacency(dict):
+    """
+    Góc nhìn danh sách kề đã sắp xếp của 1 đồ thị (dict {u: [v, ...]} hoặc CSRGraph).
+    Mỗi đỉnh chỉ được sắp xếp 1 lần, vào lúc được duyệt tới lần đầu, rồi giữ lại cho
+    các lượt sau. Vì đọc dần từ đồ thị gốc, đồ thị gốc không được đổi trong lúc dùng:
+    nên bọc 1 snapshot bất biến và tạo góc nhìn mới theo version, vd.
+        model.cached(("sorted_adj", directed), lambda: SortedAdjacency(model.to_csr(directed)))
+    """
+    def __init__(self, graph):
+        super().__init__()
+        self.graph = graph
 
-    while queue:
-        current = queue.popleft()
-        visited_order.append(current)
-        neighbors = sorted(adj_list.get(current, [])) # Sắp xếp để duyệt theo thứ tự
-        
-        for neighbor in neighbors:
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append(neighbor)
-    
-    return visited_order
-
-# --- 2. DFS ---
-def run_dfs(adj_list, start_node):
+    def __missing__(self, u):
+        graph = self.graph
+        if isinstance(graph, CSRGraph):
+            neighbors = sorted(graph.neighbors(u))
+        else:
+            neighbors = sorted(graph.get(u, []))
+        self[u] = neighbors
+        return neighbors
+
+    def has_node(self, u) -> bool:
+        graph = self.graph
+        if isinstance(graph, CSRGraph):
+            return isinstance(u, int) and 0 <= u < graph.num_nodes
+        return u in graph
+
+def _sorted_view(adj_list) -> SortedAdjacency:
+    return adj_list if isinstance(adj_list, SortedAdjacency) else SortedAdjacency(adj_list)
+
+# --- 1. BỘ DUYỆT DẠNG GENERATOR (stack/queue tường minh, không đệ quy) ---
+def iter_bfs(adj_list, start_node) -> Iterator[Tuple[object, object, int, str]]:
     """
-    Thuật toán DFS (Duyệt theo chiều sâu)
-    Input: adj_list, start_node
-    Output: Danh sách thứ tự duyệt
+    BFS sinh sự kiện dần dần: (node, parent, depth, event) với event là
+    DISCOVER (lúc đỉnh được đưa vào hàng đợi) hoặc FINISH (lúc đã xét hết đỉnh kề);
+    parent là đỉnh cha trên cây BFS ở cả 2 loại sự kiện (None ở đỉnh xuất phát).
+    Input: dict {u: [v, ...]}, CSRGraph hoặc SortedAdjacency (sắp xếp sẵn, dùng lại).
+    Thứ tự DISCOVER trùng thứ tự duyệt của run_bfs.
     """
-    if start_node not in adj_list:
-        return []
+    neighbors = _sorted_view(adj_list)
+    if not neighbors.has_node(start_node):
+        return
 
-    visited = set()
-    visited_order = []
+    visited = {start_node}
+    queue = deque([(start_node, None, 0)])
+    yield start_node, None, 0, DISCOVER
 
-    # Hàm đệ quy nội bộ
-    def dfs_recursive(u):
-        visited.add(u)
-        visited_order.append(u)
-        
-        # Lấy danh sách kề và sắp xếp
-        neighbors = sorted(adj_list.get(u, []))
-        for v in neighbors:
+    while queue:
+        u, parent, depth = queue.popleft()
+        for v in neighbors[u]:
             if v not in visited:
-                dfs_recursive(v)
+                visited.add(v)
+                queue.append((v, u, depth + 1))
+                yield v, u, depth + 1, DISCOVER
+        yield u, parent, depth, FINISH
+
+def iter_dfs(adj_list, start_node) -> Iterator[Tuple[object, object, int, str]]:
+    """
+    DFS sinh sự kiện dần dần: (node, parent, depth, event), DISCOVER theo thứ tự
+    tiền thứ tự (như bản đệ quy cũ), FINISH theo hậu thứ tự.
+    Dùng stack tường minh (đỉnh, vị trí đỉnh kề kế tiếp) nên không bị giới hạn
+    độ sâu đệ quy trên chuỗi đường dài.
+    """
+    neighbors = _sorted_view(adj_list)
+    if not neighbors.has_node(start_node):
+        return
+
+    visited = {start_node}
+    yield start_node, None, 0, DISCOVER
+    stack = [[start_node, neighbors[start_node], 0]]   # Khung: [đỉnh, đỉnh kề, vị trí kế tiếp]
 
-    # Bắt đầu chạy
-    dfs_recursive(start_node)
-    return visited_order
\ No newline at end of file
+    while stack:
+        frame = stack[-1]
+        u, adj_u, i = frame
+        while i < len(adj_u) and adj_u[i] in visited:
+            i += 1
+        if i < len(adj_u):
+            v = adj_u[i]
+            frame[2] = i + 1
+            visited.add(v)
+            yield v, u, len(stack), DISCOVER
+            stack.append([v, neighbors[v], 0])
+        else:
+            stack.pop()
+            yield u, stack[-1][0] if stack else None, len(stack), FINISH
+
+# --- 2. BFS ---
+def run_bfs(adj_list, start_node):
+    """
+    Thuật toán BFS (Duyệt theo chiều rộng)
+    Input: adj_list (dict, CSRGraph hoặc SortedAdjacency), start_node
+    Output: Danh sách thứ tự duyệt
+    """
+    return [node for node, _, _, event in iter_bfs(adj_list, start_node) if event == DISCOVER]
+
+# --- 3. DFS ---
+def run_dfs(adj_list, start_node):
+    """
+    Thuật toán DFS (Duyệt theo chiều sâu)
+    Input: adj_list (dict, CSRGraph hoặc SortedAdjacency), start_node
+    Output: Danh sách thứ tự duyệt
+    """
+    return [node for node, _, _, event in iter_dfs(adj_list, start_node) if event == DISCOVER]
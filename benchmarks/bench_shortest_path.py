@@ -0,0 +1,98 @@
+#Đo tốc độ tìm đường ngắn nhất: engine của dự án so với networkx
+#
+# Chạy từ thư mục gốc:  python -m benchmarks.bench_shortest_path [số_đỉnh] [số_truy_vấn]
+
+import random
+import sys
+import time
+
+from algorithms.shortest_path import TrafficGraph, a_star_search, shortest_path_tree
+from algorithms.route_cache import RouteCache
+
+try:
+    import networkx as nx
+except ImportError:
+    nx = None
+
+def make_map(n, seed=0):
+    """Bản đồ giống canvas: lưới n đỉnh, trọng số nguyên 1..999 (như QInputDialog.getInt)."""
+    rnd = random.Random(seed)
+    side = max(2, int(n ** 0.5))
+    nodes = [((i % side) * 60.0, (i // side) * 60.0) for i in range(n)]
+    edges = []
+    for i in range(n):
+        for j in (i + 1, i + side):
+            if j < n and (j != i + 1 or j % side):
+                edges.append((i, j, rnd.randint(1, 999), False))
+    return nodes, edges
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    costs = [fn(s, t) for s, t in queries]
+    return time.perf_counter() - start, costs
+
+def run(n=20000, num_queries=50, directed=False, seed=0):
+    nodes, edges = make_map(n, seed)
+    rnd = random.Random(seed + 1)
+    queries = [(rnd.randrange(n), rnd.randrange(n)) for _ in range(num_queries)]
+    # Nửa số truy vấn lặp lại cùng vài điểm xuất phát (kho, bệnh viện...)
+    depots = [rnd.randrange(n) for _ in range(3)]
+    queries += [(rnd.choice(depots), rnd.randrange(n)) for _ in range(num_queries)]
+
+    results = []
+
+    graph = TrafficGraph.from_canvas_data(nodes, edges, directed)
+    graph.out_index()
+    graph.in_index()
+
+    def native_astar(s, t):
+        return a_star_search(graph, str(s), str(t), mode='distance')[1]
+    results.append(("TrafficGraph a_star_search",) + timed(native_astar, queries))
+
+    def native_tree(s, t):
+        return shortest_path_tree(graph, s, 'distance', targets={t})[0][t]
+    results.append(("TrafficGraph Dijkstra (Dial, dừng ở đích)",) + timed(native_tree, queries))
+
+    cache = RouteCache(graph)
+    def native_cache(s, t):
+        return cache.route(str(s), str(t), mode='distance')[1]
+    results.append(("RouteCache (GUI)",) + timed(native_cache, queries))
+
+    if nx is not None:
+        G = nx.DiGraph() if directed else nx.Graph()
+        G.add_nodes_from(range(n))
+        for u, v, w, _ in edges:
+            G.add_edge(u, v, weight=w)
+
+        def nx_twice(s, t):
+            # Cách GUI cũ: 2 lần Dijkstra cho cùng 1 truy vấn
+            try:
+                nx.dijkstra_path(G, s, t, weight='weight')
+                return nx.dijkstra_path_length(G, s, t, weight='weight')
+            except nx.NetworkXNoPath:
+                return float('inf')
+        results.append(("networkx dijkstra_path + _length",) + timed(nx_twice, queries))
+
+        def nx_once(s, t):
+            try:
+                return nx.single_source_dijkstra(G, s, t, weight='weight')[0]
+            except nx.NetworkXNoPath:
+                return float('inf')
+        results.append(("networkx single_source_dijkstra",) + timed(nx_once, queries))
+
+    reference = results[0][2]
+    print(f"Bản đồ: {n} đỉnh, {len(edges)} cạnh, {'có' if directed else 'vô'} hướng, {len(queries)} truy vấn")
+    baseline = results[-2][1] if nx is not None else None
+    for name, elapsed, costs in results:
+        same = all(a == b or abs(a - b) < 1e-9 for a, b in zip(costs, reference))
+        speedup = f"x{baseline / elapsed:5.1f}" if baseline else ""
+        print(f"  {name:<42} {elapsed * 1000 / len(queries):9.2f} ms/truy vấn  {speedup:>7}  "
+              f"{'khớp' if same else 'SAI KHÁC'}")
+    if nx is None:
+        print("  (chưa cài networkx: bỏ qua phần so sánh)")
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    q = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    for directed in (False, True):
+        run(n, q, directed)
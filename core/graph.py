@@ -1,6 +1,6 @@
 #class Graph , Node , Edge 
 
-from PyQt6.QtWidgets import QFileDialog
+from array import array
 
 class Node:
     """
@@ -30,73 +30,379 @@ class Edge:
         self.weight = weight          
         self.is_curved = is_curved    
 
+    @property
+    def source_key(self):
+        return self.source.key
+
+    @property
+    def destination_key(self):
+        return self.destination.key
+
+    def get_raw_data(self):
+        """Trả về tuple (u, v, w, is_curved) giống định dạng của Canvas."""
+        return (self.source.key, self.destination.key, self.weight, self.is_curved)
+
     def __repr__(self):
         return f"Edge({self.source.key}->{self.destination.key}, w={self.weight})"
 
+
+class CSRGraph:
+    """
+    Ảnh chụp (snapshot) BẤT BIẾN của đồ thị dạng CSR (Compressed Sparse Row).
+    - Cung đi ra của u nằm ở targets/weights[offsets[u] : offsets[u+1]].
+    - edge_ids[i]: chỉ số cạnh gốc (trong Graph.edges / canvas.edges) sinh ra cung i.
+    - Đồ thị có hướng có thêm CSR ngược (rev_*) để duyệt cung đi vào.
+      Đồ thị vô hướng lưu mỗi cạnh 2 chiều nên CSR ngược chính là CSR xuôi.
+    Các mảng dùng array.array (không tạo tuple cho từng cung), có thể đưa thẳng
+    vào numpy bằng np.frombuffer nếu cần.
+    """
+    __slots__ = ("num_nodes", "directed", "offsets", "targets", "weights", "edge_ids",
+                 "rev_offsets", "rev_sources", "rev_weights", "rev_edge_ids")
+
+    def __init__(self, num_nodes, directed, offsets, targets, weights, edge_ids,
+                 rev_offsets=None, rev_sources=None, rev_weights=None, rev_edge_ids=None):
+        self.num_nodes = num_nodes
+        self.directed = directed
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.edge_ids = edge_ids
+
+        if rev_offsets is None:
+            # Vô hướng: CSR ngược trùng CSR xuôi
+            rev_offsets, rev_sources, rev_weights, rev_edge_ids = offsets, targets, weights, edge_ids
+        self.rev_offsets = rev_offsets
+        self.rev_sources = rev_sources
+        self.rev_weights = rev_weights
+        self.rev_edge_ids = rev_edge_ids
+
+    @staticmethod
+    def _pack(num_nodes, arcs):
+        """Counting sort danh sách cung (u, v, w, edge_id) theo u -> 4 mảng CSR."""
+        offsets = array('q', bytes(8 * (num_nodes + 1)))
+        for u, _, _, _ in arcs:
+            offsets[u + 1] += 1
+        for i in range(num_nodes):
+            offsets[i + 1] += offsets[i]
+
+        m = len(arcs)
+        targets = array('i', bytes(4 * m))
+        weights = array('d', bytes(8 * m))
+        edge_ids = array('i', bytes(4 * m))
+
+        # Giữ nguyên thứ tự cung của từng đỉnh (sắp xếp ổn định)
+        fill = array('q', offsets)
+        for u, v, w, k in arcs:
+            pos = fill[u]
+            targets[pos] = v
+            weights[pos] = w
+            edge_ids[pos] = k
+            fill[u] = pos + 1
+        return offsets, targets, weights, edge_ids
+
+    @classmethod
+    def from_edges(cls, num_nodes: int, edges, directed: bool = False):
+        """
+        Xây snapshot từ danh sách cạnh [(u, v, w), ...] với đỉnh đánh số 0..n-1.
+        Cạnh có chỉ số ngoài khoảng [0, n) bị bỏ qua (giống canvas khi vẽ).
+        """
+        fwd = []
+        rev = []
+        for k, (u, v, w) in enumerate(edges):
+            if not (0 <= u < num_nodes and 0 <= v < num_nodes):
+                continue
+            w = float(w)
+            fwd.append((u, v, w, k))
+            if directed:
+                rev.append((v, u, w, k))
+            else:
+                fwd.append((v, u, w, k))
+
+        offsets, targets, weights, edge_ids = cls._pack(num_nodes, fwd)
+        if not directed:
+            return cls(num_nodes, False, offsets, targets, weights, edge_ids)
+
+        return cls(num_nodes, True, offsets, targets, weights, edge_ids, *cls._pack(num_nodes, rev))
+
+    def num_arcs(self):
+        return len(self.targets)
+
+    def out_range(self, u):
+        """Khoảng chỉ số cung đi ra của u (dùng với targets/weights/edge_ids)."""
+        return range(self.offsets[u], self.offsets[u + 1])
+
+    def in_range(self, v):
+        """Khoảng chỉ số cung đi vào v (dùng với rev_sources/rev_weights/rev_edge_ids)."""
+        return range(self.rev_offsets[v], self.rev_offsets[v + 1])
+
+    def neighbors(self, u):
+        return self.targets[self.offsets[u]:self.offsets[u + 1]]
+
+    def degree(self, u):
+        return self.offsets[u + 1] - self.offsets[u]
+
+    def to_adjacency_list(self, weighted=True):
+        """Chuyển ngược về danh sách kề dạng dict (tương thích code cũ)."""
+        adj = {}
+        for u in range(self.num_nodes):
+            lo, hi = self.offsets[u], self.offsets[u + 1]
+            if weighted:
+                adj[u] = list(zip(self.targets[lo:hi], self.weights[lo:hi]))
+            else:
+                adj[u] = list(self.targets[lo:hi])
+        return adj
+
+    def __repr__(self):
+        kind = "directed" if self.directed else "undirected"
+        return f"CSRGraph(n={self.num_nodes}, arcs={self.num_arcs()}, {kind})"
+
 class Graph:
     """
     Graph Adapter: Quản lý cấu trúc Node/Edge Objects và cung cấp 
     danh sách kề (Adjacency List) dễ dùng cho các thuật toán.
+
+    Mô hình có số phiên bản (version): mỗi thao tác sửa trên Canvas (thêm nút,
+    thêm/thay cạnh, đổi trọng số) tăng version lên 1 và cập nhật
+    NGAY các danh sách kề đã dựng (O(1) mỗi thao tác), nên chạy lại thuật toán
+    trên bản đồ không đổi không phải dựng lại gì.
+    Di chuyển nút chỉ đổi tọa độ, không đổi cấu trúc: tăng geometry_version riêng,
+    không ghi log, nên kéo thả nút không làm mất các bộ đệm theo version.
     """
+    MAX_LOG = 10000             # Số thao tác tối đa giữ lại cho changes_since()
+
     def __init__(self, directed: bool = False):
         self.nodes = {}             # {index: Node object}
         self.edges = []             # List of Edge objects (chỉ lưu cạnh đi)
         self.directed = directed
         self._adj_list = {}         # Danh sách kề được tính toán
+        self.version = 0            # Tăng mỗi khi cấu trúc / trọng số bản đồ thay đổi
+        self.geometry_version = 0   # Tăng mỗi khi tọa độ nút thay đổi (kéo thả)
+        self._reset_state()
+
+    def _reset_state(self):
+        self.version += 1
+        self._edge_index = {}       # {(u, v): vị trí cạnh trong self.edges}
+        self._slots = []            # [(vị trí ở adj có hướng[u], adj vô hướng[u], adj vô hướng[v])]
+        self._out_count = {}        # Số phần tử đã có trong adj có hướng của từng đỉnh
+        self._und_count = {}        # Số phần tử đã có trong adj vô hướng của từng đỉnh
+        self._views = {}            # {(weighted, directed): danh sách kề đang được cập nhật dần}
+        self._cache = {}            # {key: (version, value)} cho các dữ liệu dẫn xuất
+        self._log = []              # [(op, data)] các thao tác kể từ _log_base
+        self._log_base = self.version
 
     def num_nodes(self):
         return len(self.nodes)
 
+    # ------------------------------------------------------------------
+    # THAO TÁC SỬA (mỗi thao tác = 1 version)
+    # ------------------------------------------------------------------
+    def _record(self, op, data):
+        self.version += 1
+        self._log.append((op, data))
+        if len(self._log) > self.MAX_LOG:
+            drop = len(self._log) // 2
+            del self._log[:drop]
+            self._log_base += drop
+
+    def add_node(self, x: float, y: float) -> int:
+        """Thêm giao lộ mới, key = số nút hiện có (giống chỉ số trên Canvas)."""
+        key = len(self.nodes)
+        self.nodes[key] = Node(key, x, y)
+        self._out_count[key] = 0
+        self._und_count[key] = 0
+        for adj in self._views.values():
+            adj[key] = []
+        self._record("add_node", (key, x, y))
+        return key
+
+    def move_node(self, key: int, x: float, y: float) -> None:
+        node = self.nodes[key]
+        node.x, node.y = x, y
+        self.geometry_version += 1
+
+    def set_edge(self, u: int, v: int, weight, is_curved: bool = False) -> int:
+        """
+        Thêm cạnh u -> v, hoặc thay cạnh cũ cùng 2 đầu mút (giống Canvas).
+        Trả về vị trí cạnh trong self.edges (trùng chỉ số trong canvas.edges).
+        """
+        try:
+            weight = float(weight)
+        except (ValueError, TypeError):
+            weight = 1.0
+
+        k = self._edge_index.get((u, v))
+        if k is None:
+            k = len(self.edges)
+            edge = Edge(self.nodes[u], self.nodes[v], weight, is_curved)
+            self.edges.append(edge)
+            self.nodes[u].neighbors.append(edge)
+            self._edge_index[(u, v)] = k
+            self._add_slots(u, v)
+            for (weighted, directed), adj in self._views.items():
+                adj[u].append((v, weight) if weighted else v)
+                if not directed:
+                    adj[v].append((u, weight) if weighted else u)
+            old_weight = None
+        else:
+            edge = self.edges[k]
+            old_weight = edge.weight
+            edge.weight = weight
+            edge.is_curved = is_curved
+            if weight != old_weight:
+                self._patch_weight(k, u, v, weight)
+
+        self._record("set_edge", (k, u, v, weight, is_curved, old_weight))
+        return k
+
+    def set_weight(self, u: int, v: int, weight) -> int:
+        """Đổi trọng số cạnh u -> v có sẵn (giữ nguyên kiểu vẽ cong/thẳng)."""
+        k = self._edge_index[(u, v)]
+        return self.set_edge(u, v, weight, self.edges[k].is_curved)
+
+    def set_directed(self, directed: bool) -> None:
+        if directed != self.directed:
+            self.directed = directed
+            self._record("set_directed", (directed,))
+
+    def clear(self):
+        self.nodes.clear()
+        self.edges.clear()
+        self._adj_list = {}
+        self._reset_state()
+
+    def edge_index(self, u: int, v: int):
+        """Vị trí cạnh u -> v trong self.edges (None nếu chưa có), O(1)."""
+        return self._edge_index.get((u, v))
+
+    def changes_since(self, version: int):
+        """
+        Danh sách thao tác [(op, data), ...] từ `version` tới hiện tại để bộ đệm
+        bên ngoài cập nhật dần. Trả về None nếu log không còn đủ (phải dựng lại).
+        """
+        if version < self._log_base or version > self.version:
+            return None
+        return self._log[version - self._log_base:]
+
+    def _add_slots(self, u, v):
+        # Vị trí của cạnh trong từng loại danh sách kề là cố định (chỉ append)
+        pos_dir = self._out_count[u]
+        self._out_count[u] = pos_dir + 1
+        pos_u = self._und_count[u]
+        self._und_count[u] = pos_u + 1
+        pos_v = self._und_count[v]
+        self._und_count[v] = pos_v + 1
+        self._slots.append((pos_dir, pos_u, pos_v))
+
+    def _patch_weight(self, k, u, v, weight):
+        pos_dir, pos_u, pos_v = self._slots[k]
+        for (weighted, directed), adj in self._views.items():
+            if not weighted:
+                continue
+            if directed:
+                adj[u][pos_dir] = (v, weight)
+            else:
+                adj[u][pos_u] = (v, weight)
+                adj[v][pos_v] = (u, weight)
+
+    # ------------------------------------------------------------------
+    # CÁC GÓC NHÌN (VIEW) DÙNG CHO THUẬT TOÁN
+    # ------------------------------------------------------------------
+    def adjacency_list(self, weighted: bool = True, directed: bool = None):
+        """
+        Danh sách kề {u: [(v, w), ...]} (hoặc {u: [v, ...]} nếu weighted=False).
+        Dựng 1 lần rồi được cập nhật dần theo từng thao tác sửa.
+        LƯU Ý: đối tượng trả về dùng chung, thuật toán chỉ được đọc.
+        """
+        if directed is None:
+            directed = self.directed
+        key = (weighted, directed)
+        adj = self._views.get(key)
+        if adj is None:
+            adj = {i: [] for i in self.nodes.keys()}
+            for edge in self.edges:
+                u = edge.source_key
+                v = edge.destination_key
+                w = edge.weight
+
+                # Cạnh xuôi (u -> v)
+                adj[u].append((v, w) if weighted else v)
+
+                # Cạnh ngược (v -> u) nếu là đồ thị vô hướng
+                if not directed:
+                    adj[v].append((u, w) if weighted else u)
+            self._views[key] = adj
+        return adj
+
     def build_adjacency_list(self):
         """
         Tính toán và trả về Danh sách kề chuẩn {u: [(v, w), ...]} 
         dùng cho các thuật toán.
         """
-        n = self.num_nodes
-        adj = {i: [] for i in self.nodes.keys()}
-        
-        for edge in self.edges:
-            u = edge.source_key
-            v = edge.destination_key
-            w = edge.weight
-
-            # Cạnh xuôi (u -> v)
-            adj[u].append((v, w))
-            
-            # Cạnh ngược (v -> u) nếu là đồ thị vô hướng
-            if not self.directed:
-                adj[v].append((u, w))
-                
-        self._adj_list = adj
+        self._adj_list = self.adjacency_list(weighted=True, directed=self.directed)
         return self._adj_list
 
+    def cached(self, key, builder):
+        """
+        Bộ đệm theo version cho dữ liệu dẫn xuất: builder() chỉ chạy lại khi
+        bản đồ đã thay đổi kể từ lần gọi trước với cùng key.
+        """
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == self.version:
+            return entry[1]
+        value = builder()
+        self._cache[key] = (self.version, value)
+        return value
+
+    def to_csr(self, directed: bool = None):
+        """
+        Đóng gói Node/Edge hiện tại thành CSRGraph (snapshot bất biến) để các
+        thuật toán trong algorithms/* duyệt bằng mảng thay vì dict/tuple.
+        Đỉnh được đánh số lại 0..n-1 theo thứ tự key. Snapshot được giữ lại
+        tới khi bản đồ đổi version.
+        """
+        if directed is None:
+            directed = self.directed
+
+        def build():
+            keys = sorted(self.nodes.keys())
+            index = {key: i for i, key in enumerate(keys)}
+            edges = [(index[e.source_key], index[e.destination_key], e.weight) for e in self.edges]
+            return CSRGraph.from_edges(len(keys), edges, directed)
+
+        return self.cached(("csr", directed), build)
+
     def from_canvas_data(self, canvas_nodes_data: list, canvas_edges_data: list):
         """
         Khôi phục đối tượng Node/Edge từ dữ liệu list of tuples của MapCanvas.
+        Cạnh thứ k của model phải trùng cạnh thứ k của canvas, nên cạnh trỏ tới nút
+        không tồn tại làm cả dữ liệu bị từ chối (ValueError) thay vì bị bỏ qua.
         """
-        self.nodes.clear()
-        self.edges.clear()
+        n = len(canvas_nodes_data)
+        for k, (u_idx, v_idx, *_) in enumerate(canvas_edges_data):
+            if not (0 <= u_idx < n and 0 <= v_idx < n):
+                raise ValueError(f"Cạnh thứ {k} ({u_idx} -> {v_idx}) nối tới nút không tồn tại")
+
+        self.clear()
 
         # 1. Khởi tạo tất cả các Node 
         for i, (x, y) in enumerate(canvas_nodes_data):
             self.nodes[i] = Node(i, x, y) 
+            self._out_count[i] = 0
+            self._und_count[i] = 0
 
-        # 2. Thêm các Edge (chỉ thêm cạnh xuôi cho đồ thị có hướng)
+        # 2. Thêm các Edge (chỉ thêm cạnh xuôi, cạnh ngược do view vô hướng tự sinh)
         for u_idx, v_idx, weight_val, is_curved in canvas_edges_data:
-            if u_idx not in self.nodes or v_idx not in self.nodes:
-                continue
-            
             try:
                 weight = float(weight_val) 
             except (ValueError, TypeError):
                 weight = 1.0 
 
             # Thêm Edge Object vào list
-            self.edges.append(Edge(u_idx, v_idx, weight, is_curved))
-            
-            # Nếu vô hướng và cạnh ngược chưa được thêm
-            if not self.directed and (v_idx, u_idx, weight_val, is_curved) not in canvas_edges_data:
-                pass 
+            edge = Edge(self.nodes[u_idx], self.nodes[v_idx], weight, is_curved)
+            self._edge_index[(u_idx, v_idx)] = len(self.edges)
+            self.edges.append(edge)
+            self.nodes[u_idx].neighbors.append(edge)
+            self._add_slots(u_idx, v_idx)
 
         # 3. Xây dựng danh sách kề sau khi có đủ Node và Edge
         self.build_adjacency_list()
@@ -112,4 +418,4 @@ class Graph:
         # Chỉ cần trả về dữ liệu thô của các Edge đã được lưu (chỉ 1 chiều)
         edges_data = [edge.get_raw_data() for edge in self.edges]
 
-        return nodes_data, edges_data
\ No newline at end of file
+        return nodes_data, edges_data
@@ -3,6 +3,8 @@ from PyQt6.QtWidgets import QWidget, QInputDialog
 from PyQt6.QtGui import QPainter, QColor, QPen, QBrush, QFont, QPolygonF, QPainterPath
 from PyQt6.QtCore import Qt, QPointF, QRect
 
+from core.graph import Graph
+
 class MapCanvas(QWidget):
     def __init__(self):
         super().__init__()
@@ -13,6 +15,10 @@ class MapCanvas(QWidget):
         # Danh sách cạnh [(u, v, weight, is_curved), ...]
         # is_curved: True (Vẽ cong), False (Vẽ thẳng)
         self.edges = [] 
+
+        # Mô hình đồ thị có version, được cập nhật dần theo từng thao tác sửa
+        # (thuật toán lấy danh sách kề từ đây thay vì dựng lại mỗi lần chạy)
+        self.graph = Graph(directed=True)
         
         # Các biến trạng thái
         self.current_mode = "view" 
@@ -23,6 +29,9 @@ class MapCanvas(QWidget):
         self.highlight_edges = []
         self.visited_nodes = []
         self.car_position = None      # Vị trí xe Euler
+
+        # Vùng tới được (Isochrone): {(u, v): phần cạnh đã đi, tính từ u (1 = cả cạnh)}
+        self.reach_edges = {}
         
         # Biến nhãn tùy chỉnh (cho Max Flow: 2/6)
         self.custom_edge_labels = {} 
@@ -42,6 +51,7 @@ class MapCanvas(QWidget):
 
     def set_graph_type(self, is_directed):
         self.is_directed = is_directed
+        self.graph.set_directed(is_directed)
         self.update()
 
     # --- HÀM QUAN TRỌNG: CHỈ XÓA MÀU (RESET VISUALS) ---
@@ -50,16 +60,45 @@ class MapCanvas(QWidget):
         self.visited_nodes = []
         self.car_position = None
         self.custom_edge_labels = {} 
+        self.reach_edges = {}
         self.update()
 
     # --- HÀM XÓA DỮ LIỆU ---
     def clear_map(self):
         self.nodes = []
         self.edges = []
+        self.graph.clear()
         self.reset_algo_visuals()
         self.selected_node = None
         self.update()
 
+    # --- HÀM NẠP DỮ LIỆU (MỞ FILE) ---
+    def load_data(self, nodes, edges):
+        # Model kiểm tra dữ liệu trước (ValueError nếu cạnh lỗi), canvas chỉ nhận khi hợp lệ
+        nodes, edges = list(nodes), list(edges)
+        self.graph.from_canvas_data(nodes, edges)
+        self.nodes = nodes
+        self.edges = edges
+        self.update()
+
+    # --- CÁC HÀM SỬA ĐỒ THỊ (GIỮ canvas.nodes/edges VÀ self.graph KHỚP NHAU) ---
+    def add_node(self, x, y):
+        self.nodes.append((x, y))
+        self.graph.add_node(x, y)
+
+    def set_edge(self, u, v, weight, is_curved=False):
+        # Model tra cạnh (u, v) bằng dict nên không phải quét toàn bộ self.edges
+        idx = self.graph.set_edge(u, v, weight, is_curved)
+        if idx == len(self.edges):
+            self.edges.append((u, v, weight, is_curved))
+        else:
+            self.edges[idx] = (u, v, weight, is_curved)
+        return idx
+
+    def move_node(self, i, x, y):
+        self.nodes[i] = (x, y)
+        self.graph.move_node(i, x, y)
+
     # --- HELPER: TÌM NÚT TẠI VỊ TRÍ CLICK ---
     def get_node_at(self, x, y):
         for i, (nx, ny) in enumerate(self.nodes):
@@ -82,7 +121,7 @@ class MapCanvas(QWidget):
         # 1. Chế độ vẽ Đỉnh
         if self.current_mode == "draw_node":
             if clicked_node is None:
-                self.nodes.append((x, y))
+                self.add_node(x, y)
                 self.update()
         
         # 2. Chế độ vẽ Cạnh
@@ -105,15 +144,8 @@ class MapCanvas(QWidget):
                         )
                         
                         if ok:
-                            exists = False
-                            for idx, (eu, ev, ew, e_curve) in enumerate(self.edges):
-                                if eu == start and ev == end:
-                                    self.edges[idx] = (start, end, weight, is_curved) 
-                                    exists = True
-                                    break
-                            
-                            if not exists:
-                                self.edges.append((start, end, weight, is_curved))
+                            # Thêm mới hoặc thay cạnh cũ cùng (start, end)
+                            self.set_edge(start, end, weight, is_curved)
                         
                         self.selected_node = None 
                     else:
@@ -135,13 +167,43 @@ class MapCanvas(QWidget):
         if self.current_mode == "view" and self.dragging_node is not None:
             x = event.position().x()
             y = event.position().y()
-            self.nodes[self.dragging_node] = (x, y)
+            self.move_node(self.dragging_node, x, y)
             self.update()
 
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             self.dragging_node = None
 
+    def mouseDoubleClickEvent(self, event):
+        # Nhấp đúp vào con số trên đường nối -> sửa trọng số
+        if event.button() != Qt.MouseButton.LeftButton:
+            return
+
+        idx = self.get_edge_label_at(event.position().x(), event.position().y())
+        if idx is None:
+            return
+
+        u, v, w, is_curved = self.edges[idx]
+        weight, ok = QInputDialog.getInt(
+            self, "Độ dài/Mức kẹt xe (trọng số)", f"Từ {u} -> {v}:",
+            value=int(w), min=1, max=999
+        )
+        if ok:
+            self.set_edge(u, v, weight, is_curved)
+            self.dragging_node = None
+            self.update()
+
+    # --- HELPER: TÌM Ô TRỌNG SỐ TẠI VỊ TRÍ CLICK ---
+    def get_edge_label_at(self, x, y):
+        for idx, (u, v, w, is_curved) in enumerate(self.edges):
+            if u >= len(self.nodes) or v >= len(self.nodes): continue
+            p1 = QPointF(self.nodes[u][0], self.nodes[u][1])
+            p2 = QPointF(self.nodes[v][0], self.nodes[v][1])
+            pos = self.curve_control_point(p1, p2) if is_curved else (p1 + p2) / 2
+            if abs(pos.x() - x) <= 16 and abs(pos.y() - y) <= 11:
+                return idx
+        return None
+
     # ==========================================================
     # VẼ GIAO DIỆN (PAINT EVENT)
     # ==========================================================
@@ -159,6 +221,16 @@ class MapCanvas(QWidget):
             p1 = QPointF(self.nodes[u][0], self.nodes[u][1])
             p2 = QPointF(self.nodes[v][0], self.nodes[v][1])
 
+            # Tô vùng tới được (vẽ dưới cạnh): từ u theo chiều u -> v, và từ v nếu vô hướng
+            if self.reach_edges:
+                frac = self.reach_edges.get((u, v))
+                if frac:
+                    self.draw_reach_overlay(painter, self.edge_path(p1, p2, is_curved), frac)
+                if not self.is_directed:
+                    frac = self.reach_edges.get((v, u))
+                    if frac:
+                        self.draw_reach_overlay(painter, self.edge_path(p2, p1, is_curved, p1, p2), frac)
+
             # Kiểm tra Highlight
             is_highlight = False
             for hu, hv in self.highlight_edges:
@@ -220,10 +292,51 @@ class MapCanvas(QWidget):
         self.draw_weight_text(painter, mid, text)
 
     def draw_curved_edge_smart(self, painter, p1, p2, text):
-        # Logic cong sang phải
         path = QPainterPath()
         path.moveTo(p1)
         
+        ctrl_point = self.curve_control_point(p1, p2)
+        
+        path.quadTo(ctrl_point, p2)
+        painter.drawPath(path)
+        
+        if self.is_directed:
+            self.draw_arrow_head(painter, ctrl_point, p2)
+        
+        self.draw_weight_text(painter, ctrl_point, text)
+
+    def edge_path(self, start, end, is_curved, p1=None, p2=None):
+        # Đường vẽ của cạnh đi từ start tới end; cạnh cong lấy điểm điều khiển
+        # theo chiều vẽ gốc p1 -> p2 (mặc định = start -> end)
+        path = QPainterPath()
+        path.moveTo(start)
+        if is_curved:
+            path.quadTo(self.curve_control_point(p1 if p1 is not None else start,
+                                                 p2 if p2 is not None else end), end)
+        else:
+            path.lineTo(end)
+        return path
+
+    def draw_reach_overlay(self, painter, path, fraction):
+        painter.save()
+        painter.setPen(QPen(QColor(26, 188, 156, 140), 10, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        if fraction >= 1:
+            painter.drawPath(path)
+        else:
+            # Chỉ tô phần đã đi được, dừng ở điểm cắt
+            part = QPainterPath()
+            part.moveTo(path.pointAtPercent(0))
+            steps = 16
+            for k in range(1, steps + 1):
+                part.lineTo(path.pointAtPercent(fraction * k / steps))
+            painter.drawPath(part)
+            painter.setBrush(QBrush(QColor("#1abc9c")))
+            painter.drawEllipse(path.pointAtPercent(fraction), 4, 4)
+        painter.restore()
+
+    def curve_control_point(self, p1, p2):
+        # Logic cong sang phải
         mid_x = (p1.x() + p2.x()) / 2
         mid_y = (p1.y() + p2.y()) / 2
         
@@ -241,15 +354,7 @@ class MapCanvas(QWidget):
         # Vector sang phải: (-u_y, u_x)
         ctrl_x = mid_x - u_y * offset
         ctrl_y = mid_y + u_x * offset
-        ctrl_point = QPointF(ctrl_x, ctrl_y)
-        
-        path.quadTo(ctrl_point, p2)
-        painter.drawPath(path)
-        
-        if self.is_directed:
-            self.draw_arrow_head(painter, ctrl_point, p2)
-        
-        self.draw_weight_text(painter, ctrl_point, text)
+        return QPointF(ctrl_x, ctrl_y)
 
     def draw_arrow_head(self, painter, start_p, end_p):
         arrow_size = 18
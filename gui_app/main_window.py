@@ -1,6 +1,5 @@
 import sys
 import json
-import networkx as nx
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QLabel, QLineEdit, QMessageBox, 
                              QComboBox, QFileDialog, QGroupBox, QInputDialog,
@@ -15,33 +14,58 @@ from gui_app.canvas import MapCanvas
 # IMPORT THUẬT TOÁN (XỬ LÝ LỖI NẾU THIẾU FILE)
 # ============================================================
 try:
-    from algorithms.flow import MaxFlow 
+    from algorithms.flow import FlowNetwork, FlowSession
 except ImportError: 
-    MaxFlow = None
+    FlowNetwork, FlowSession = None, None
     print("⚠️ Cảnh báo: Không tìm thấy module algorithms/flow.py")
 
 try:
-    from algorithms.mst import run_prim, run_kruskal
+    from algorithms.mst import run_prim, run_kruskal, MSTSession
 except ImportError: 
-    run_prim, run_kruskal = None, None
+    run_prim, run_kruskal, MSTSession = None, None, None
     print("⚠️ Cảnh báo: Không tìm thấy module algorithms/mst.py")
 
 try:
-    from algorithms.traversal import run_bfs, run_dfs
+    from algorithms.traversal import iter_bfs, iter_dfs, SortedAdjacency, DISCOVER
 except ImportError: 
-    run_bfs, run_dfs = None, None
+    iter_bfs, iter_dfs, SortedAdjacency, DISCOVER = None, None, None, None
     print("⚠️ Cảnh báo: Không tìm thấy module algorithms/traversal.py")
 
 try:
     from algorithms.shortest_path import a_star_search, TrafficGraph
+    from algorithms.route_cache import RouteCache
 except ImportError: 
-    a_star_search, TrafficGraph = None, None
+    a_star_search, TrafficGraph, RouteCache = None, None, None
     print("⚠️ Cảnh báo: Không tìm thấy module algorithms/shortest_path.py")
 
 try:
-    from algorithms.check_bipartite import check_bipartite
+    from algorithms.contraction import load_or_build
 except ImportError: 
-    check_bipartite = None
+    load_or_build = None
+    print("⚠️ Cảnh báo: Không tìm thấy module algorithms/contraction.py")
+
+try:
+    from algorithms.isochrone import isochrone
+except ImportError: 
+    isochrone = None
+    print("⚠️ Cảnh báo: Không tìm thấy module algorithms/isochrone.py")
+
+try:
+    from algorithms.connectivity import Connectivity
+except ImportError: 
+    Connectivity = None
+    print("⚠️ Cảnh báo: Không tìm thấy module algorithms/connectivity.py")
+
+try:
+    from algorithms.bridges import find_bridges
+except ImportError: 
+    find_bridges = None
+    print("⚠️ Cảnh báo: Không tìm thấy module algorithms/bridges.py")
+
+try:
+    from algorithms.check_bipartite import BipartiteTracker
+except ImportError: 
+    BipartiteTracker = None
     print("⚠️ Cảnh báo: Không tìm thấy module algorithms/check_bipartite.py")
 
 try:
@@ -68,8 +92,27 @@ class MainWindow(QMainWindow):
         
         # Các biến lưu trữ trạng thái chạy thuật toán
         self.anim_queue = []          # Hàng đợi các bước animation
+        self.anim_kind = None         # Loại animation đang chạy ("euler" / "traversal")
         self.current_path_str = []    # Lưu chuỗi log
         self.full_path_result = []    # Lưu kết quả đầy đủ
+
+        # Phiên Max Flow giữ lại giữa các lần chạy: ((s, t, directed, engine), version, FlowSession)
+        self._flow_cache = None
+
+        # Phiên cây khung giữ lại giữa các lần chạy Kruskal: (version, MSTSession)
+        self._mst_cache = None
+
+        # TrafficGraph của bản đồ: (version, geometry_version, directed, graph)
+        self._traffic_cache = None
+
+        # Cây đường đi ngắn nhất theo điểm xuất phát, gắn với TrafficGraph hiện tại
+        self._route_cache = None
+
+        # Contraction Hierarchies lưu cạnh file bản đồ: (directed, ContractionHierarchy)
+        self._hierarchy = None
+
+        # Theo dõi tính 2 phía theo từng cạnh vẽ thêm: (version, BipartiteTracker)
+        self._bipartite_cache = None
         
         # Xây dựng giao diện
         self.setup_ui()
@@ -150,7 +193,10 @@ class MainWindow(QMainWindow):
             "5. Chu trình Euler (Hierholzer)",
             "6. Duyệt BFS (Theo chiều rộng)",
             "7. Duyệt DFS (Theo chiều sâu)",
-            "8. Kiểm tra Đồ thị 2 phía (Bipartite)"
+            "8. Kiểm tra Đồ thị 2 phía (Bipartite)",
+            "9. Điểm nghẽn (Max Flow Push-Relabel + Lát cắt)",
+            "10. Vùng tới được trong ngân sách (Isochrone)",
+            "11. Đường & nút giao trọng yếu (Cầu / Khớp)"
         ])
         self.algo_selector.currentIndexChanged.connect(self.on_algo_change)
         algo_layout.addWidget(self.algo_selector)
@@ -221,33 +267,32 @@ class MainWindow(QMainWindow):
     # =========================================================================
 
     def get_clean_adj_list(self, weighted=False, directed=False):
-        """Chuyển đổi dữ liệu Canvas sang Danh sách kề chuẩn"""
-        n = len(self.canvas.nodes)
-        adj = {i: [] for i in range(n)}
-        
-        for item in self.canvas.edges:
-            # Unpack thông minh (bỏ qua is_curved nếu có)
-            if len(item) == 4: u, v, w, _ = item
-            else: u, v, w = item
-            
-            # Nếu thuật toán cần trọng số -> lưu tuple (v, w)
-            val = (v, float(w)) if weighted else v
-            adj[u].append(val)
-            
-            # Nếu là đồ thị vô hướng, thêm cạnh ngược lại
-            if not directed:
-                val_rev = (u, float(w)) if weighted else u
-                adj[v].append(val_rev)
-                
-        return adj
+        """
+        Danh sách kề chuẩn lấy từ mô hình đồ thị của Canvas.
+        Mô hình tự cập nhật theo từng thao tác vẽ/sửa nên không phải dựng lại;
+        danh sách trả về dùng chung, thuật toán chỉ được đọc.
+        """
+        return self.canvas.graph.adjacency_list(weighted=weighted, directed=directed)
 
     def toggle_directed(self, checked):
         self.canvas.set_graph_type(checked)
 
     def on_algo_change(self):
+        # Dừng animation đang chạy khi đổi thuật toán
+        self.timer.stop()
+        self.anim_queue = []
+        self.anim_kind = None
+
         txt = self.algo_selector.currentText()
+        if "Isochrone" in txt:
+            self.source_input.setPlaceholderText("ID nguồn (vd: 0,3)")
+            self.sink_input.setPlaceholderText("Ngân sách chi phí")
+        else:
+            self.source_input.setPlaceholderText("ID Bắt đầu")
+            self.sink_input.setPlaceholderText("ID Kết thúc")
+
         # Nhóm cần cả Start và End
-        if "ngắn nhất" in txt or "Max Flow" in txt:
+        if "ngắn nhất" in txt or "Max Flow" in txt or "Isochrone" in txt:
             self.input_container.setVisible(True)
             self.source_input.setVisible(True)
             self.sink_input.setVisible(True)
@@ -292,6 +337,7 @@ class MainWindow(QMainWindow):
 
         self.timer.stop()
         self.anim_queue = []
+        self.anim_kind = None
         self.lbl_status.setText("Đang xử lý...")
         
         algo = self.algo_selector.currentText()
@@ -302,7 +348,6 @@ class MainWindow(QMainWindow):
             return
 
         is_directed = self.chk_directed.isChecked()
-        G_nx = self.get_nx_graph(weighted=True, directed=is_directed)
 
         try:
             # 1. TÌM ĐƯỜNG NGẮN NHẤT
@@ -310,63 +355,76 @@ class MainWindow(QMainWindow):
                 s, t = self.get_inputs(n, need_sink=True)
                 if s is None: return
 
-                try:
-                    path = nx.dijkstra_path(G_nx, s, t, weight='weight')
-                    cost = nx.dijkstra_path_length(G_nx, s, t, weight='weight')
-                    
+                if not RouteCache:
+                    QMessageBox.warning(self, "Thiếu Module", "Không tìm thấy shortest_path.py")
+                    return
+
+                # Kiểm tra điều kiện O(1) trước: 2 điểm khác vùng thì khỏi tìm
+                conn = self.get_connectivity(is_directed)
+                if conn and not conn.reachable(s, t):
+                    reason = ("thuộc 2 vùng không nối với nhau" if not conn.same_component(s, t)
+                              else "chỉ nối bằng đường một chiều theo hướng ngược lại")
+                    self.lbl_status.setText("Không tìm thấy đường đi.")
+                    QMessageBox.warning(self, "Kết quả", f"Không có đường đi: {s} và {t} {reason}.")
+                    return
+
+                # Bản đồ vừa lưu / mở chưa sửa: truy vấn trên CH đã tiền xử lý.
+                # Ngược lại 1 lần tìm trên TrafficGraph, cây từ Start được giữ lại
+                ch = self.get_hierarchy(is_directed)
+                if ch is not None:
+                    path, cost = ch.query(str(s), str(t))
+                else:
+                    path, cost = self.get_route_cache(is_directed).route(str(s), str(t), mode='distance')
+
+                if path is None:
+                    self.lbl_status.setText("Không tìm thấy đường đi.")
+                    QMessageBox.warning(self, "Kết quả", "Không có đường đi giữa 2 điểm này.")
+                else:
+                    path = [int(x) for x in path]
                     edges_hl = [(path[i], path[i+1]) for i in range(len(path)-1)]
                     self.canvas.highlight_edges = edges_hl
                     self.canvas.update()
                     
-                    msg = f"Chi phí: {cost}\nLộ trình: {' -> '.join(map(str, path))}"
+                    msg = f"Chi phí: {cost:g}\nLộ trình: {' -> '.join(map(str, path))}"
                     self.lbl_status.setText(f"Hoàn tất: {msg}")
                     QMessageBox.information(self, "Kết quả (Dijkstra)", msg)
-                    
-                except nx.NetworkXNoPath:
-                    self.lbl_status.setText("Không tìm thấy đường đi.")
-                    QMessageBox.warning(self, "Kết quả", "Không có đường đi giữa 2 điểm này.")
 
             # 2. MAX FLOW
             elif "Max Flow" in algo:
-                if not MaxFlow:
+                if not FlowSession:
                     QMessageBox.warning(self, "Thiếu Module", "Không tìm thấy flow.py")
                     return
                 
                 s, t = self.get_inputs(n, need_sink=True)
                 if s is None: return
                 
-                matrix = [[0]*n for _ in range(n)]
-                capacity_matrix = [[0]*n for _ in range(n)]
-
-                for item in self.canvas.edges:
-                    if len(item) == 4: u, v, w, _ = item
-                    else: u, v, w = item
-                    
-                    matrix[u][v] = int(w)
-                    capacity_matrix[u][v] = int(w)
-                    if not is_directed: 
-                        matrix[v][u] = int(w)
-                        capacity_matrix[v][u] = int(w)
-
-                mf = MaxFlow(matrix)
-                max_val, flow_mat = mf.ford_fulkerson(s, t)
+                engine = "push_relabel" if "Push-Relabel" in algo else "dinic"
+                session = self.get_flow_session(s, t, is_directed, engine)
+                max_val, flows = session.value, session.flows()
+                cap_edges = [(u, v, int(w)) for u, v, w, *_ in self.canvas.edges]
                 
                 hl = []
                 self.canvas.custom_edge_labels = {} # Reset nhãn
 
-                for u in range(n):
-                    for v in range(n):
-                        f = flow_mat[u][v]
-                        c = capacity_matrix[u][v]
-                        if c > 0: # Có cạnh
-                            if f > 0: hl.append((u, v))
-                            self.canvas.custom_edge_labels[(u, v)] = f"{f}/{c}"
+                for (u, v, c), f in zip(cap_edges, flows):
+                    # Đường 2 chiều: luồng âm nghĩa là xe chạy theo chiều v -> u
+                    if f > 0: hl.append((u, v))
+                    elif f < 0: hl.append((v, u))
+                    self.canvas.custom_edge_labels[(u, v)] = f"{abs(f)}/{c}"
+
+                msg = f"Luồng cực đại: {max_val}"
+                if engine == "push_relabel":
+                    # Chỉ tô các tuyến đường thuộc lát cắt nhỏ nhất (điểm nghẽn thật sự)
+                    _, cut_edges = session.min_cut()
+                    hl = [cap_edges[k][:2] for k in cut_edges]
+                    roads = ", ".join(f"{u}->{v}" for u, v in hl)
+                    msg += f"\nĐiểm nghẽn ({len(hl)} tuyến): {roads}"
                 
                 self.canvas.highlight_edges = hl
                 self.canvas.update()
                 
-                self.lbl_status.setText(f"Max Flow: {max_val}")
-                QMessageBox.information(self, "Kết quả Max Flow", f"Luồng cực đại: {max_val}")
+                self.lbl_status.setText(msg.replace("Luồng cực đại", "Max Flow"))
+                QMessageBox.information(self, "Kết quả Max Flow", msg)
 
             # 3 & 4. MST (Prim/Kruskal)
             elif "Prim" in algo or "Kruskal" in algo:
@@ -374,24 +432,38 @@ class MainWindow(QMainWindow):
                     QMessageBox.warning(self, "Thiếu Module", "Không tìm thấy mst.py")
                     return
                 
-                adj_w = self.get_clean_adj_list(weighted=True, directed=False)
-                
-                if not nx.is_connected(G_nx.to_undirected()):
-                      QMessageBox.warning(self, "Lỗi", "Đồ thị không liên thông, không thể tìm cây khung!")
-                      return
+                # Snapshot CSR (giữ theo version): Prim duyệt thẳng trên mảng
+                csr = self.canvas.graph.to_csr(directed=False)
                 
                 if "Prim" in algo:
-                    mst_edges, total = run_prim(adj_w)
+                    # Start là tùy chọn: bỏ trống thì bắt đầu từ đỉnh 0
+                    start = None
+                    if self.source_input.text().strip():
+                        start, _ = self.get_inputs(n, need_sink=False)
+                        if start is None: return
+                    mst_edges, total = run_prim(csr, start)
                     name = "Prim"
                 else:
-                    mst_edges, total = run_kruskal(adj_w)
+                    # Cây khung được giữ lại và sửa cục bộ theo các thao tác sửa bản đồ
+                    session, added, removed = self.get_mst_session()
+                    mst_edges, total = session.tree_edges(), session.total_weight
                     name = "Kruskal"
                 
                 self.canvas.highlight_edges = mst_edges
                 self.canvas.update()
                 
+                # Đồ thị không liên thông -> kết quả là rừng khung (mỗi thành phần 1 cây)
+                conn = self.get_connectivity(False)
+                num_trees = conn.num_weak if conn else n - len(mst_edges)
+                msg = f"Thuật toán {name}\nTổng trọng số: {total}"
+                if name == "Kruskal" and (added or removed):
+                    fmt = lambda ks: ", ".join(f"{self.canvas.edges[k][0]}-{self.canvas.edges[k][1]}" for k in ks)
+                    msg += f"\nCạnh mới vào cây: {fmt(added) or '-'}\nCạnh bị thay: {fmt(removed) or '-'}"
+                if num_trees > 1:
+                    msg += f"\nĐồ thị không liên thông: rừng khung gồm {num_trees} cây"
+                
                 self.lbl_status.setText(f"{name}: Tổng trọng số {total}")
-                QMessageBox.information(self, "Kết quả MST", f"Thuật toán {name}\nTổng trọng số: {total}")
+                QMessageBox.information(self, "Kết quả MST", msg)
 
             # 5. EULER
             elif "Euler" in algo:
@@ -399,11 +471,18 @@ class MainWindow(QMainWindow):
                     QMessageBox.warning(self, "Thiếu Module", "Không tìm thấy euler.py")
                     return
                 
-                adj = self.get_clean_adj_list(weighted=False, directed=is_directed)
-                path = find_euler_path(adj)
+                # Mọi tuyến đường phải cùng 1 vùng liên thông, nếu không xe không đi hết được
+                conn = self.get_connectivity(is_directed)
+                if conn and not conn.edges_connected():
+                    self.lbl_status.setText("Không có chu trình Euler.")
+                    QMessageBox.warning(self, "Lỗi Euler", "Các tuyến đường không liên thông với nhau.")
+                    return
+
+                path = find_euler_path(self.canvas.graph.to_csr(directed=is_directed))
                 
                 if path:
                     self.anim_queue = list(path)
+                    self.anim_kind = "euler"
                     self.full_path_result = list(path)
                     self.current_path_str = []
                     self.canvas.highlight_edges = []
@@ -419,45 +498,111 @@ class MainWindow(QMainWindow):
 
             # 6 & 7. BFS / DFS
             elif "BFS" in algo or "DFS" in algo:
-                if not (run_bfs and run_dfs):
+                if not (iter_bfs and iter_dfs):
                     QMessageBox.warning(self, "Thiếu Module", "Không tìm thấy traversal.py")
                     return
                 
                 s, _ = self.get_inputs(n, need_sink=False)
                 if s is None: return
                 
-                adj = self.get_clean_adj_list(weighted=False, directed=is_directed)
+                # Danh sách kề sắp xếp sẵn trên snapshot CSR (bất biến), giữ tới khi
+                # bản đồ đổi version; sửa bản đồ giữa lúc animation không làm lẫn dữ liệu
+                model = self.canvas.graph
+                neighbors = model.cached(("sorted_adj", is_directed),
+                                         lambda: SortedAdjacency(model.to_csr(is_directed)))
                 
                 if "BFS" in algo:
-                    path = run_bfs(adj, s)
+                    events = iter_bfs(neighbors, s)
                     name = "BFS"
                 else:
-                    path = run_dfs(adj, s)
+                    events = iter_dfs(neighbors, s)
                     name = "DFS"
                 
-                self.anim_queue = list(path)
-                self.full_path_result = list(path)
+                # Animation lấy từng đỉnh từ generator, không chờ duyệt hết
+                self.anim_queue = (node for node, _, _, event in events if event == DISCOVER)
+                self.anim_kind = "traversal"
+                self.full_path_result = []
                 self.current_path_str = []
                 self.canvas.visited_nodes = []
                 
                 self.lbl_status.setText(f"Đang chạy {name}...")
                 self.timer.start(800)
 
+            # 10. ISOCHRONE
+            elif "Isochrone" in algo:
+                if not isochrone:
+                    QMessageBox.warning(self, "Thiếu Module", "Không tìm thấy isochrone.py")
+                    return
+                try:
+                    sources = [int(x) for x in self.source_input.text().replace(" ", "").split(",") if x]
+                    budget = float(self.sink_input.text())
+                except ValueError:
+                    QMessageBox.warning(self, "Lỗi Nhập liệu", "Nguồn là các ID cách nhau bởi dấu phẩy, ngân sách là số.")
+                    return
+                if not sources or any(not (0 <= x < n) for x in sources):
+                    QMessageBox.warning(self, "Lỗi Nhập liệu", "Đỉnh nguồn không tồn tại")
+                    return
+
+                graph = self.get_traffic_graph(is_directed)
+                iso = isochrone(graph, [str(x) for x in sources], budget, mode='distance')
+
+                # Tô vùng trực tiếp từ kết quả (đỉnh tới được + cung đi hết / đi dở)
+                self.canvas.visited_nodes = [int(x) for x in iso.reached]
+                self.canvas.reach_edges = {(int(u), int(v)): f for u, v, f in iso.covered}
+                self.canvas.update()
+
+                msg = (f"Tới được {len(iso.reached)} đỉnh trong ngân sách {budget:g}\n"
+                       f"Đường đi dở (điểm cắt): {len(iso.frontier)}")
+                self.lbl_status.setText(f"Hoàn tất: {msg}")
+                QMessageBox.information(self, "Kết quả (Isochrone)", msg)
+
             # 8. BIPARTITE
             elif "2 phía" in algo:
-                if not check_bipartite:
+                if not BipartiteTracker:
                     QMessageBox.warning(self, "Thiếu Module", "Không tìm thấy check_bipartite.py")
                     return
                 
-                adj = self.get_clean_adj_list(weighted=False, directed=False)
-                is_bi, color_map = check_bipartite(adj)
+                # Chỉ áp các cạnh mới vẽ từ lần kiểm tra trước
+                tracker = self.get_bipartite_tracker()
                 
-                if is_bi:
+                if tracker.is_bipartite:
                     self.lbl_status.setText("✅ Đồ thị 2 phía")
                     QMessageBox.information(self, "Kết quả", "LÀ đồ thị 2 phía.")
                 else:
+                    # Tô chu trình lẻ làm bằng chứng (cả 2 chiều để khớp cạnh có hướng)
+                    cycle = tracker.witness_edges()
+                    self.canvas.highlight_edges = cycle + [(v, u) for u, v in cycle]
+                    self.canvas.visited_nodes = tracker.witness[:-1]
+                    self.canvas.update()
+                    
+                    cycle_str = " -> ".join(map(str, tracker.witness))
                     self.lbl_status.setText("❌ Không phải 2 phía")
-                    QMessageBox.warning(self, "Kết quả", "KHÔNG phải đồ thị 2 phía.")
+                    QMessageBox.warning(self, "Kết quả", 
+                                        f"KHÔNG phải đồ thị 2 phía.\nChu trình lẻ ({len(cycle)} cạnh): {cycle_str}")
+
+            # 11. CẦU & ĐIỂM KHỚP
+            elif "trọng yếu" in algo:
+                if not find_bridges:
+                    QMessageBox.warning(self, "Thiếu Module", "Không tìm thấy bridges.py")
+                    return
+
+                # Đóng đường là đóng cả 2 chiều -> xét trên bản đồ vô hướng, giữ theo version
+                model = self.canvas.graph
+                bridges, cut_nodes, components = model.cached(
+                    "bridges", lambda: find_bridges(model.to_csr(directed=False)))
+
+                # Cầu tô như cạnh highlight, điểm khớp tô như đỉnh đã duyệt
+                self.canvas.highlight_edges = list(bridges)
+                self.canvas.visited_nodes = list(cut_nodes)
+                self.canvas.update()
+
+                roads = ", ".join(f"{u}-{v}" for u, v in bridges) or "-"
+                nodes = ", ".join(map(str, cut_nodes)) or "-"
+                msg = (f"Tuyến đường trọng yếu (cầu) - {len(bridges)}: {roads}\n"
+                       f"Nút giao trọng yếu (điểm khớp) - {len(cut_nodes)}: {nodes}\n"
+                       f"Số thành phần song liên thông: {len(components)}")
+                self.lbl_status.setText(f"Cầu: {len(bridges)}, Điểm khớp: {len(cut_nodes)}")
+                QMessageBox.information(self, "Kết quả (Cầu / Khớp)", msg)
 
         except Exception as e:
             import traceback
@@ -468,10 +613,11 @@ class MainWindow(QMainWindow):
     # ANIMATION
     # =========================================================================
     def on_animation_step(self):
-        algo = self.algo_selector.currentText()
+        # Theo loại animation lúc bắt đầu chạy, không theo mục đang chọn trên combo
+        kind = self.anim_kind
         
         # Euler Animation
-        if "Euler" in algo:
+        if kind == "euler":
             if len(self.anim_queue) > 1:
                 u = self.anim_queue.pop(0)
                 v = self.anim_queue[0]
@@ -487,9 +633,10 @@ class MainWindow(QMainWindow):
                 QMessageBox.information(self, "Thành công", f"Lộ trình Euler:\n{path_str}")
         
         # BFS/DFS Animation
-        elif "BFS" in algo or "DFS" in algo:
-            if self.anim_queue:
-                node = self.anim_queue.pop(0)
+        elif kind == "traversal":
+            node = next(self.anim_queue, None)
+            if node is not None:
+                self.full_path_result.append(node)
                 self.canvas.visited_nodes.append(node)
                 self.canvas.update()
                 
@@ -501,19 +648,173 @@ class MainWindow(QMainWindow):
                 QMessageBox.information(self, "Duyệt Xong", f"Thứ tự:\n{final_text}")
 
     # =========================================================================
-    # CÁC HÀM PHỤ TRỢ (NETWORKX, DIALOG...)
+    # CÁC HÀM PHỤ TRỢ (ĐỒ THỊ, DIALOG...)
     # =========================================================================
-    def get_nx_graph(self, weighted=False, directed=False):
-        G = nx.DiGraph() if directed else nx.Graph()
-        for i in range(len(self.canvas.nodes)):
-            G.add_node(i)
-        for item in self.canvas.edges:
-            if len(item) == 4: u, v, w, _ = item
-            else: u, v, w = item
-            
-            if weighted: G.add_edge(u, v, weight=int(w))
-            else: G.add_edge(u, v)
-        return G
+    def get_traffic_graph(self, directed):
+        """
+        TrafficGraph của bản đồ (trọng số cạnh = độ dài, dùng mode 'distance').
+        Giữ lại giữa các lần chạy: thêm đỉnh / thêm cạnh thì áp thẳng vào, kéo thả nút
+        thì chép lại tọa độ, sửa trọng số hoặc đổi có hướng thì dựng lại.
+        """
+        model = self.canvas.graph
+        cached = self._traffic_cache
+        changes = None
+        if cached and cached[2] == directed:
+            changes = model.changes_since(cached[0])
+            if changes and any(op == "set_directed" or (op == "set_edge" and data[5] is not None)
+                               for op, data in changes):
+                changes = None
+
+        if changes is None:
+            graph = TrafficGraph.from_canvas_data(self.canvas.nodes, self.canvas.edges, directed)
+        else:
+            graph = cached[3]
+            for op, data in changes:
+                if op == "add_node":
+                    key, x, y = data
+                    graph.add_node(str(key), x, y)
+                elif op == "set_edge":
+                    _, u, v, w, _, _ = data
+                    graph.add_road(str(u), str(v), float(w), one_way=directed)
+
+            if cached[1] != model.geometry_version:
+                for key, (x, y) in enumerate(self.canvas.nodes):
+                    graph.move_node(str(key), x, y)
+
+        self._traffic_cache = (model.version, model.geometry_version, directed, graph)
+        return graph
+
+    def get_connectivity(self, directed):
+        """
+        Phân tích liên thông (thành phần yếu / mạnh) của bản đồ, tính 1 lần cho mỗi
+        version của mô hình nên các bước kiểm tra điều kiện sau đó là O(1).
+        Trả về None nếu thiếu module connectivity.py.
+        """
+        if not Connectivity:
+            return None
+        model = self.canvas.graph
+        return model.cached(("connectivity", directed), lambda: Connectivity(model.to_csr(directed)))
+
+    def attach_hierarchy(self, map_path):
+        """
+        Nạp CH đi kèm file bản đồ (map.ch_distance.json) nếu còn khớp, nếu không thì
+        dựng và lưu lại, để các lần mở sau bỏ qua bước tiền xử lý.
+        """
+        self._hierarchy = None
+        if not (load_or_build and TrafficGraph) or not self.canvas.nodes:
+            return
+        directed = self.chk_directed.isChecked()
+        ch = load_or_build(self.get_traffic_graph(directed), map_path, mode='distance')
+        self._hierarchy = (directed, ch)
+
+    def get_hierarchy(self, directed):
+        """CH đã nạp nếu vẫn đúng với bản đồ hiện tại (chưa sửa gì từ lúc lưu / mở), ngược lại None."""
+        if self._hierarchy is None or self._hierarchy[0] != directed:
+            return None
+        ch = self._hierarchy[1]
+        graph = self.get_traffic_graph(directed)
+        if ch.graph is not graph or ch.version != graph.version:
+            self._hierarchy = None
+            return None
+        return ch
+
+    def get_route_cache(self, directed):
+        """Bộ đệm cây đường đi cho TrafficGraph hiện tại (tạo mới khi đồ thị được dựng lại)."""
+        graph = self.get_traffic_graph(directed)
+        if self._route_cache is None or self._route_cache.graph is not graph:
+            self._route_cache = RouteCache(graph)
+        return self._route_cache
+
+    def get_flow_session(self, s, t, directed, engine="dinic"):
+        """
+        Phiên Max Flow cho (s, t). Nếu chỉ sửa trọng số/thêm đường kể từ lần
+        chạy trước thì sửa luồng cũ tại chỗ (warm start) thay vì tính lại từ 0.
+        """
+        model = self.canvas.graph
+        key = (s, t, directed, engine)
+        cached = self._flow_cache
+        changes = None
+        if cached and cached[0] == key:
+            changes = model.changes_since(cached[1])
+
+        if changes is None or any(op == "set_directed" for op, _ in changes):
+            # Mạng thặng dư thưa: mỗi cạnh canvas = 1 cạnh của mạng (cùng chỉ số)
+            cap_edges = [(u, v, int(w)) for u, v, w, *_ in self.canvas.edges]
+            net = FlowNetwork.from_edges(len(self.canvas.nodes), cap_edges, directed=directed)
+            session = FlowSession(net, s, t, engine=engine)
+        else:
+            session = cached[2]
+            for op, data in changes:
+                if op == "add_node":
+                    session.add_node()
+                elif op == "set_edge":
+                    k, u, v, w, _, old_weight = data
+                    if old_weight is None:
+                        session.add_edge(u, v, int(w), two_way=not directed)
+                    else:
+                        session.set_capacity(k, int(w))
+
+        self._flow_cache = (key, model.version, session)
+        return session
+
+    def get_mst_session(self):
+        """
+        Phiên cây khung cho bản đồ (vô hướng). Nếu đã có từ lần chạy trước thì
+        chỉ áp các thao tác sửa mới. Trả về (session, added, removed) với
+        added/removed là chỉ số cạnh canvas vừa vào/ra khỏi cây.
+        """
+        model = self.canvas.graph
+        cached = self._mst_cache
+        changes = model.changes_since(cached[0]) if cached else None
+        added, removed = set(), set()
+
+        if changes is None:
+            edges = [(u, v, float(w)) for u, v, w, *_ in self.canvas.edges]
+            session = MSTSession(len(self.canvas.nodes), edges)
+        else:
+            session = cached[1]
+            for op, data in changes:
+                if op == "add_node":
+                    session.add_node()
+                elif op == "set_edge":
+                    k, u, v, w, _, old_weight = data
+                    if old_weight is None:
+                        _, a, r = session.insert_edge(u, v, w)
+                    else:
+                        a, r = session.update_weight(k, w)
+                    # Cạnh vào rồi ra (hoặc ngược lại) trong cùng đợt thì triệt tiêu
+                    for e in a:
+                        if e in removed: removed.discard(e)
+                        else: added.add(e)
+                    for e in r:
+                        if e in added: added.discard(e)
+                        else: removed.add(e)
+
+        self._mst_cache = (model.version, session)
+        return session, sorted(added), sorted(removed)
+
+    def get_bipartite_tracker(self):
+        """
+        BipartiteTracker của bản đồ (bỏ qua chiều). Nếu đã có từ lần chạy trước thì
+        chỉ áp các đỉnh / cạnh mới; đổi trọng số hay đổi có hướng không ảnh hưởng.
+        """
+        model = self.canvas.graph
+        cached = self._bipartite_cache
+        changes = model.changes_since(cached[0]) if cached else None
+
+        if changes is None:
+            edges = [(u, v) for u, v, *_ in self.canvas.edges]
+            tracker = BipartiteTracker(len(self.canvas.nodes), edges)
+        else:
+            tracker = cached[1]
+            for op, data in changes:
+                if op == "add_node":
+                    tracker.add_node()
+                elif op == "set_edge" and data[5] is None:
+                    tracker.add_edge(data[1], data[2])
+
+        self._bipartite_cache = (model.version, tracker)
+        return tracker
 
     def show_representation_dialog(self):
         n = len(self.canvas.nodes)
@@ -570,6 +871,7 @@ class MainWindow(QMainWindow):
             }
             try:
                 with open(path, 'w') as f: json.dump(data, f)
+                self.attach_hierarchy(path)
                 QMessageBox.information(self, "Thành công", "Đã lưu file!")
             except Exception as e:
                 QMessageBox.critical(self, "Lỗi", str(e))
@@ -581,7 +883,7 @@ class MainWindow(QMainWindow):
                 with open(path, 'r') as f: data = json.load(f)
                 
                 self.canvas.clear_map()
-                self.canvas.nodes = [tuple(n) for n in data["nodes"]]
+                nodes = [tuple(n) for n in data["nodes"]]
                 
                 new_edges = []
                 for e in data["edges"]:
@@ -590,11 +892,12 @@ class MainWindow(QMainWindow):
                     else:
                         new_edges.append(tuple(e))
                 
-                self.canvas.edges = new_edges
+                self.canvas.load_data(nodes, new_edges)
                 is_dir = data.get("directed", True)
                 self.chk_directed.setChecked(is_dir)
                 self.canvas.set_graph_type(is_dir)
                 self.canvas.update()
+                self.attach_hierarchy(path)
                 QMessageBox.information(self, "Thành công", "Đã tải đồ thị!")
             except Exception as e:
                 QMessageBox.critical(self, "Lỗi", str(e))
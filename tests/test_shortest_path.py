@@ -0,0 +1,29 @@
+# Kiểm thử hồi quy cho algorithms/shortest_path.py
+#
+# Chạy từ thư mục gốc:  python -m pytest -q
+
+import math
+
+from algorithms.shortest_path import TrafficGraph, a_star_search, shortest_path_tree
+from algorithms.route_cache import RouteCache
+
+def make_speed_zero_map():
+    """Tam giác 0-1-2, đường 0-1 có tốc độ 0 (thời gian = inf, coi như cấm đi)."""
+    g = TrafficGraph()
+    for i in range(3):
+        g.add_node(str(i), float(i), 0.0)
+    g.add_road('0', '1', 1, speed_limit_kmh=0)
+    g.add_road('0', '2', 1, speed_limit_kmh=40)
+    g.add_road('1', '2', 1, speed_limit_kmh=40)
+    return g
+
+def test_integer_weights_rejects_infinite_time():
+    g = make_speed_zero_map()
+    assert g.integer_weights('time') is None
+
+def test_speed_zero_road_is_impassable():
+    g = make_speed_zero_map()
+    dist, _ = shortest_path_tree(g, 0, 'time')
+    assert dist[1] == 0.05 and not math.isinf(dist[1])
+    assert a_star_search(g, '0', '1', 'time') == (['0', '2', '1'], 0.05)
+    assert RouteCache(g).route('0', '1', 'time') == (['0', '2', '1'], 0.05)